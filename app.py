@@ -3,15 +3,27 @@ import pandas as pd  #Read uploads to CSV- Store, pass, clean data
 import numpy as np #np.linspace for forecasting
 from datetime import datetime
 from config import Config
-from modules.data_processor import DataProcessor
+from modules.data_processor import PROCESSING_VERSION, DataProcessor
+from modules.dataset_cache import dataset_cache
+from modules.snapshots import snapshot_store
 from modules.visuals import Visualizations
 from modules.insights_engine import InsightsEngine
-import requests
+from modules.industry_benchmarks import industry_benchmarks, ordinal
+from modules.ingestion import CSVIngestor, normalize_columns
+from modules.priority_index import PriorityIndex
+from modules.rollup import CategoryRollup
+from modules.scenario_engine import DISTRIBUTIONS, ScenarioEngine
+from modules.sample_generator import GenerationError, SampleDataClient, parse_generated_csv
+from modules import instrumentation, warmup
+from modules.instrumentation import stage
+from modules.memory import compact_frame, session_memory
 import io
 import json
 
 # Initialize configuration
 config = Config()
+if int(pd.__version__.split('.')[0]) < 3: #always on from pandas 3, where the option is deprecated
+    pd.set_option('mode.copy_on_write', True) #shared cached frames are handed out as shallow copies
 
 # Set page config
 st.set_page_config(
@@ -25,10 +37,33 @@ if 'data' not in st.session_state: #App cached
     st.session_state.data = None
 if 'industry' not in st.session_state:
     st.session_state.industry = 'retail'
+if 'company_size' not in st.session_state:
+    st.session_state.company_size = 'mid'
 
 # Initialize modules
 data_processor = DataProcessor() #Business logic
-visuals = Visualizations() #Chart Tools
+visuals = Visualizations(config.LARGE_DATA_THRESHOLD) #Chart Tools
+
+@st.cache_resource #one pooled session per process, not per rerun
+def get_sample_client():
+    return SampleDataClient( #Hugging Face client with retries + response cache
+        config.HF_API_KEY,
+        endpoint_url=config.HF_MODEL_URL,
+        timeout=(config.HF_CONNECT_TIMEOUT, config.HF_READ_TIMEOUT),
+        retries=config.HF_RETRIES,
+        cache_dir=config.HF_CACHE_DIR
+    )
+
+ingestor = CSVIngestor(data_processor, chunksize=config.INGEST_CHUNK_SIZE, engine=config.INGEST_ENGINE) #Chunked CSV reader
+
+def processing_settings():
+    # Everything besides the file bytes that changes the processed frame
+    return {
+        'version': PROCESSING_VERSION,
+        'dtypes': ingestor.dtypes,
+        'memory_optimized': config.MEMORY_OPTIMIZED,
+        'anomaly': data_processor.anomaly_detector.settings()
+    }
 
 # --- UI Components ---
 def show_onboarding_tour():
@@ -46,29 +81,6 @@ def show_onboarding_tour():
                 st.write(step['content'])
                 st.write("---")
 
-def normalize_columns(df):
-    # First pass normalization
-    df.columns = [str(col).strip().lower().replace(' ', '_') for col in df.columns] #Help organize columns
-    
-    # Specific column mappings
-    column_mappings = {
-        'sku': 'sku',
-        'category': 'category',
-        'inventorydays': 'inventory_days',
-        'unitssold': 'units_sold',
-        'unitcost': 'unit_cost',
-        'unitprice': 'unit_price',
-        'customerpaymentdays': 'customer_payment_days',
-        'supplierpaymentdays': 'supplier_payment_days'
-    }
-    
-    # Apply specific mappings
-    for original, new in column_mappings.items():
-        if original in df.columns and new not in df.columns:
-            df.rename(columns={original: new}, inplace=True)
-    
-    return df
-
 def data_upload_section():
     st.header("Data Input")
 
@@ -82,17 +94,67 @@ def data_upload_section():
             help="Upload your business data in CSV format"
         )
 
-        if uploaded_file:
+        upload_id = getattr(uploaded_file, 'file_id', None) or (uploaded_file and (uploaded_file.name, uploaded_file.size))
+        if uploaded_file and st.session_state.get('upload_id') != upload_id: #reruns keep the processed frame
             try:
-                df = pd.read_csv(uploaded_file)
-                df = normalize_columns(df)  #Lowercase and consistent columns
-                df = data_processor.standardize_columns(df)
-                df = data_processor.calculate_metrics(df)
+                progress_bar = st.progress(0.0, text="Reading file...")
+
+                def report_progress(rows_done, fraction):
+                    progress_bar.progress(fraction or 0.0, text=f"Processed {rows_done:,} rows")
+
+                def process():
+                    #Header is resolved once, body is read in typed chunks with metrics per chunk
+                    df = ingestor.ingest(uploaded_file, progress=report_progress)
+                    if config.MEMORY_OPTIMIZED: #downcast + categorical labels, same displayed numbers
+                        df = compact_frame(df)
+                    return df
+
+                #Same bytes + same settings (from any session) -> reuse the processed frame
+                key = dataset_cache.fingerprint(uploaded_file, processing_settings())
+                df, cache_hit = dataset_cache.get_or_process(key, process)
+                progress_bar.empty()
                 st.session_state.data = df
-                st.success("Data processed successfully!")
+                st.session_state.upload_id = upload_id
+                st.session_state.source = (uploaded_file.name, key) #name + fingerprint for snapshots
+                st.session_state.dataset_key = (df, key) #charts reuse the fingerprint instead of rehashing df
+                st.success("Loaded previously processed data!" if cache_hit else "Data processed successfully!")
             except Exception as e:
                 st.error(f"Error processing file: {str(e)}")
 
+        if st.session_state.data is not None:
+            delta_file = st.file_uploader(
+                "Apply a delta (upsert by SKU)",
+                type="csv",
+                help="New and updated SKUs for the current dataset, only these rows are recomputed"
+            )
+            delta_id = getattr(delta_file, 'file_id', None) or (delta_file and (delta_file.name, delta_file.size))
+            if delta_file and st.session_state.get('delta_id') != delta_id:
+                try:
+                    df = st.session_state.data
+                    #Keep scoring with the model of the originally processed data across deltas
+                    pinned = st.session_state.get('anomaly_model')
+                    model = pinned[1] if pinned and pinned[0] is df else data_processor.anomaly_model(df)
+
+                    merged, touched = data_processor.upsert(df, ingestor.read(delta_file), model)
+                    insights_engine = st.session_state.get('insights_engine')
+                    if insights_engine is not None and insights_engine.df is df:
+                        insights_engine.update(merged, touched) #only the touched SKUs are re-evaluated
+
+                    source_name, fingerprint = st.session_state.get('source') or ('dataset', None)
+                    st.session_state.source = (
+                        source_name,
+                        dataset_cache.fingerprint(delta_file, {'base': fingerprint, **processing_settings()})
+                    )
+                    if fingerprint: #without a base fingerprint the delta alone doesn't identify the data
+                        st.session_state.dataset_key = (merged, st.session_state.source[1])
+                    st.session_state.anomaly_model = (merged, model)
+                    st.session_state.data = merged
+                    st.session_state.delta_id = delta_id
+                    new_rows = len(merged) - len(df)
+                    st.success(f"Updated {len(touched) - new_rows:,} SKUs, added {new_rows:,}")
+                except Exception as e:
+                    st.error(f"Error applying delta: {str(e)}")
+
                 
 
     with col2:
@@ -102,61 +164,44 @@ def data_upload_section():
             placeholder="e.g., Organic Coffee Roastery"
         )
 
+        batches = st.number_input("Batches of 5 rows", min_value=1, max_value=10, value=1, help="Batches are requested in parallel")
+        refresh = st.checkbox("Ask again instead of reusing saved answers", value=False)
+
         if st.button("Generate with AI") and business_idea: #button pressed and business_data is populated
             with st.spinner("Generating sample data..."):
                 try:
-                    headers = {"Authorization": f"Bearer {config.HF_API_KEY}"}
-                    payload = {
-                       #MAIN PROMPT
-                       #Models output CSV, avoids getting unnessary text from the LLM, column asked are only what is expected
-                        "inputs": f"Generate 5 sample product rows for a {business_idea} business with: sku, category, inventory_days, units_sold, unit_cost, unit_price, customer_payment_days, supplier_payment_days. Return only CSV."
-                    }
-                    #Call Hugging Face API - send POST with prompt and auth
-                    #points to Mixtral endpoint
-                    response = requests.post(
-                        "https://api-inference.huggingface.co/models/mistralai/Mixtral-8x7B-Instruct-v0.1",
-                        headers=headers,
-                        json=payload
+                    #Call Hugging Face API through the pooled, cached client (Mixtral endpoint by default)
+                    texts = get_sample_client().generate_sample(business_idea, batches=batches, use_cache=not refresh)
+
+                    st.subheader("Raw AI Output")
+                    st.text_area("Check if the result is valid CSV:", "\n\n".join(texts), height=200)
+
+                    df_sample = pd.concat([parse_generated_csv(text) for text in texts], ignore_index=True)
+                    df_sample = normalize_columns(df_sample)
+
+                    numeric_cols = ['inventory_days', 'units_sold', 'unit_cost', 'unit_price', 'customer_payment_days', 'supplier_payment_days']
+                    for col in numeric_cols: #Columns must be numbers and not strings
+                        if col in df_sample.columns:
+                            df_sample[col] = pd.to_numeric(df_sample[col], errors='coerce') #takes a col, tries to convert to int/fl using pandas, stores back in col
+                    
+                    #Finalizes AI data to match uploaded
+                    df_sample = data_processor.standardize_columns(df_sample)
+                    df_sample = data_processor.calculate_metrics(df_sample)
+                    if config.MEMORY_OPTIMIZED:
+                        df_sample = compact_frame(df_sample)
+
+                    st.session_state.data = df_sample #Store result in memory
+                    st.session_state.source = (
+                        business_idea,
+                        dataset_cache.fingerprint(io.BytesIO("\n\n".join(texts).encode()), processing_settings())
                     )
-
-                    if response.status_code == 200: #if success
-                        result = response.json() #load json
-                        
-                        #Ensures data is in the format we want and Mixtral didnt give like a sentence
-                        if isinstance(result, list) and 'generated_text' in result[0]: #no empty {} json
-                            result = result[0]['generated_text'] #API needs to return a list
-                        else:
-                            st.error("AI model returned unexpected format.")
-                            st.stop()
-
-                        st.subheader("Raw AI Output")
-                        st.text_area("Check if the result is valid CSV:", result, height=200)
-                        
-
-                        #Result trimming, add more if needed or if more efficient
-                        result = result.strip() 
-                        if result.startswith("Generate"):
-                            result = result[result.find("\n")+1:]
-
-                        df_sample = pd.read_csv(io.StringIO(result)) #Converts result to an in-memory file, reads with pandas
-                        df_sample = normalize_columns(df_sample)
-
-                        numeric_cols = ['inventory_days', 'units_sold', 'unit_cost', 'unit_price', 'customer_payment_days', 'supplier_payment_days']
-                        for col in numeric_cols: #Columns must be numbers and not strings
-                            if col in df_sample.columns:
-                                df_sample[col] = pd.to_numeric(df_sample[col], errors='coerce') #takes a col, tries to convert to int/fl using pandas, stores back in col
-                        
-                        #Finalizes AI data to match uploaded
-                        df_sample = data_processor.standardize_columns(df_sample)
-                        df_sample = data_processor.calculate_metrics(df_sample)
-
-                        st.session_state.data = df_sample #Store result in memory
-                        st.success("Sample data generated!")
-                        st.dataframe(df_sample.head())
-                    else:
-                        st.error(f"Failed to generate data. Status code: {response.status_code}")
-                        st.text_area("Raw API response", response.text, height=200)
-                        st.stop()
+                    st.session_state.dataset_key = (df_sample, st.session_state.source[1])
+                    st.success("Sample data generated!")
+                    st.dataframe(df_sample.head())
+                except GenerationError as e:
+                    st.error(str(e))
+                    if e.text:
+                        st.text_area("Raw API response", e.text, height=200)
                 except Exception as e:
                     st.error(f"Generation error: {str(e)}")
 
@@ -180,100 +225,279 @@ def analysis_dashboard():
     st.header("Analysis Dashboard")
 
     # Industry selection
-    st.session_state.industry = st.selectbox( # dropdown list for industries
+    industry_col, size_col = st.columns(2)
+    industries = industry_benchmarks.industries() #loaded from BENCHMARK_DATA_PATH once per process
+    st.session_state.industry = industry_col.selectbox( # dropdown list for industries
         "Select your industry for benchmarking",
-        options=list(config.INDUSTRY_BENCHMARKS.keys()) #Industry benchmarks are just benchmarks for now but will be changed with professional data later
-
+        options=industries,
+        index=industries.index(st.session_state.industry) if st.session_state.industry in industries else 0,
+        format_func=lambda name: name.replace('_', ' ').title()
+    )
+    sizes = industry_benchmarks.sizes(st.session_state.industry)
+    st.session_state.company_size = size_col.selectbox(
+        "Company size",
+        options=sizes,
+        index=sizes.index(st.session_state.company_size) if st.session_state.company_size in sizes else 0
     )
+    benchmark_key = (st.session_state.industry, st.session_state.company_size)
+
+    # Category/SKU rollup, built once per dataset for the KPI tiles and the sunburst
+    rollup = st.session_state.get('rollup')
+    if rollup is None or rollup[0] is not df:
+        rollup = (df, CategoryRollup(df, top_n=config.ROLLUP_TOP_SKUS))
+        st.session_state.rollup = rollup
+    rollup = rollup[1]
 
     # Key metrics
     st.subheader("Key Metrics")
+    kpis = rollup.kpis()
     col1, col2, col3 = st.columns(3) #Horizontal boxes for metric display
     with col1:
-        st.metric("Total Revenue", f"${df['revenue'].sum():,.2f}")
+        st.metric("Total Revenue", f"${kpis['revenue']:,.2f}")
     with col2:
-        st.metric("Avg Cash Cycle", f"{df['cash_cycle_days'].mean():.1f} days")
+        st.metric("Avg Cash Cycle", f"{kpis['avg_cash_cycle_days']:.1f} days")
     with col3:
-        st.metric("Capital Loops/Year", f"{df['loops_per_year'].mean():.1f}x")
+        st.metric("Capital Loops/Year", f"{kpis['avg_loops_per_year']:.1f}x")
 
     # Visualizations
     st.subheader("Portfolio Analysis")
     tab1, tab2, tab3 = st.tabs(["Sunburst View", "Priority Matrix", "Benchmarks"])
+    # Figures are built once per dataset and reused across reruns. The key is the source fingerprint
+    # stored with the frame; a frame without one is hashed once and the hash kept the same way
+    saved_key = st.session_state.get('dataset_key')
+    if saved_key is not None and saved_key[0] is df and saved_key[1]:
+        dataset_key = saved_key[1]
+    else:
+        dataset_key = visuals.dataset_key(df)
+        st.session_state.dataset_key = (df, dataset_key)
 
 
     # See which products/categories contribute the most revenue and which are bottlenecks
+    # (figures come from the cache first, so chart_render times only sending one to the browser)
     with tab1:
-        st.plotly_chart( #uses plotly sunburst to show Outer: SKU, inner: category, Color: cash_cycle_days, Size: revanue
-            visuals.cash_cycle_sunburst(df),
-            use_container_width=True
-        )
+        #Outer: top SKUs + Other, inner: category, Color: cash_cycle_days, Size: revenue
+        fig = visuals.cached_figure('cash_cycle_sunburst', rollup, key=dataset_key)
+        with stage('chart_render:cash_cycle_sunburst', rows=len(df)):
+            st.plotly_chart(fig, use_container_width=True)
 
     #What is most worth your attention?
     with tab2:
-        st.plotly_chart( #uses plotly bubble chart to 
-            visuals.priority_matrix(df),
-            use_container_width=True
-        )
+        fig = visuals.cached_figure('priority_matrix', df, key=dataset_key) #uses plotly bubble chart
+        with stage('chart_render:priority_matrix', rows=len(df)):
+            st.plotly_chart(fig, use_container_width=True)
 
 
     #chart compares your actual metrics to the industry benchmark
     with tab3:
-        st.plotly_chart( #inverntory days, Payment gaps, Capital loops/year
-            visuals.benchmark_comparison(
-                df,
-                config.INDUSTRY_BENCHMARKS[st.session_state.industry]
-            ),
-            use_container_width=True
+        if config.BENCHMARK_DATA_PATH == config.SAMPLE_BENCHMARK_DATA_PATH:
+            st.caption("Illustrative benchmarks: the bundled industry figures are placeholders, not survey data. "
+                       "Set BENCHMARK_DATA_PATH to use your own.")
+        fig = visuals.cached_figure( #inverntory days, Payment gaps, Capital loops/year
+            'benchmark_comparison',
+            df,
+            industry_benchmarks.summary(*benchmark_key),
+            key=dataset_key
         )
+        with stage('chart_render:benchmark_comparison', rows=len(df)):
+            st.plotly_chart(fig, use_container_width=True)
+
+        # Every SKU ranked against the selected industry (one vectorized pass per metric)
+        ranks = st.session_state.get('benchmark_ranks')
+        if ranks is None or ranks[0] is not df or ranks[1] != benchmark_key:
+            ranks = (df, benchmark_key, industry_benchmarks.percentile_ranks(df, *benchmark_key))
+            st.session_state.benchmark_ranks = ranks
+        ranks = ranks[2]
+        rank_cols = st.columns(3)
+        for rank_col, (label, column) in zip(rank_cols, [
+            ("Inventory Days", 'inventory_days_pct'),
+            ("Payment Gap", 'payment_gap_pct'),
+            ("Capital Loops", 'loops_per_year_pct')
+        ]):
+            rank_col.metric(f"{label}: median SKU percentile", ordinal(ranks[column].median()))
+        st.caption("Percentile = share of the industry with a lower value. Lower is better for inventory days and payment gap, higher for loops.")
+        with st.expander("Per-SKU percentiles"):
+            st.dataframe(pd.concat([df[['sku', 'category']], ranks], axis=1).head(1000))
 
     # Scenario modeling 
     #What IF you Improve
     st.subheader("Scenario Modeling")
     with st.expander("Adjust Parameters"):
-        col1, col2 = st.columns(2)
+        controls, surface = st.columns([1, 2]) #sliders on the left, full response surface on the right
         
         #inv_reduction = 5 means: simulate optimizing your supply chain so inventory sits for 5 fewer days
         #payment_improvement = 5 means: simulate customers paying 5 days faster
-        with col1:
+        with controls:
             inv_reduction = st.slider("Reduce Inventory Days By", 0, 30, 5, help="Simulate inventory optimization")
-        with col2:
             payment_improvement = st.slider("Improve Customer Payment Days By",0, 30, 5,help="Simulate better payment terms")
 
-        # Apply scenario
-        scenario_df = df.copy()
-
-        # Ensure these columns (with new changes) are numeric
-        scenario_df['inventory_days'] = pd.to_numeric(scenario_df['inventory_days'], errors='coerce')
-        scenario_df['customer_payment_days'] = pd.to_numeric(scenario_df['customer_payment_days'], errors='coerce')
-
-        scenario_df['inventory_days'] = scenario_df['inventory_days'] - inv_reduction
-        scenario_df['customer_payment_days'] = scenario_df['customer_payment_days'] - payment_improvement
-
-        scenario_df = data_processor.calculate_metrics(scenario_df)
-
-        delta_revenue = scenario_df['revenue'].sum() - df['revenue'].sum()
-        delta_loops = scenario_df['loops_per_year'].mean() - df['loops_per_year'].mean()
-
+        # Apply scenario (baseline arrays are built once per dataset, not per slider move)
+        engine = st.session_state.get('scenario_engine')
+        if engine is None or engine.df is not df:
+            engine = ScenarioEngine(df)
+            st.session_state.scenario_engine = engine
+        scenario = engine.summarize(inv_reduction, payment_improvement)
 
         #Compare results
-        st.metric("Projected Revenue Impact", 
-                 f"${scenario_df['revenue'].sum():,.2f}",
-                 f"{delta_revenue:,.2f}")
-        st.metric("Projected Capital Velocity",
-                 f"{scenario_df['loops_per_year'].mean():.1f}x",
-                 f"{delta_loops:.1f}x")
+        with controls:
+            st.metric("Projected Revenue Impact", 
+                     f"${scenario['revenue']:,.2f}",
+                     f"{scenario['delta_revenue']:,.2f}")
+            st.metric("Projected Capital Velocity",
+                     f"{scenario['loops_per_year']:.1f}x",
+                     f"{scenario['delta_loops_per_year']:.1f}x")
+
+        #Whole 0-30 x 0-30 grid in one pass, cached on the engine
+        with surface:
+            surface_metric = st.radio(
+                "Response surface",
+                options=['revenue_efficiency', 'loops_per_year'],
+                format_func=lambda m: 'Total Revenue Efficiency' if m == 'revenue_efficiency' else 'Mean Loops/Year',
+                horizontal=True
+            )
+            sweep = engine.sweep(range(0, 31), range(0, 31))
+            st.plotly_chart(
+                visuals.scenario_heatmap(sweep, surface_metric, current=(inv_reduction, payment_improvement)),
+                use_container_width=True
+            )
+            if surface_metric == 'revenue_efficiency' and sweep['excluded_skus'].max():
+                st.caption(
+                    f"SKUs whose cash cycle drops to zero days or below are left out of revenue efficiency "
+                    f"({scenario['excluded_skus']:,} at the current sliders, up to {sweep['excluded_skus'].max():,} on this grid)"
+                )
+
+        # Stochastic version of the sliders: per-SKU shifts drawn around the slider values
+        st.markdown("**Uncertainty (Monte Carlo)**")
+        mc1, mc2, mc3, mc4, mc5 = st.columns(5)
+        with mc1:
+            distribution = st.selectbox("Distribution", DISTRIBUTIONS, help="Shape of the per-SKU day shifts")
+        with mc2:
+            inv_spread = st.number_input("Inventory spread (days)", min_value=0.0, value=3.0, step=0.5,
+                                         help="Std. deviation (normal) or half-width (uniform/triangular)")
+        with mc3:
+            pay_spread = st.number_input("Payment spread (days)", min_value=0.0, value=3.0, step=0.5)
+        with mc4:
+            draws = st.number_input("Draws", min_value=100, max_value=20_000, value=config.MONTE_CARLO_DRAWS, step=100)
+        with mc5:
+            seed = st.number_input("Seed", min_value=0, value=config.MONTE_CARLO_SEED, step=1)
+
+        simulation_args = dict(
+            draws=int(draws),
+            inventory=(distribution, inv_reduction, inv_spread),
+            payment=(distribution, payment_improvement, pay_spread),
+            seed=int(seed),
+            chunk_rows=config.MONTE_CARLO_CHUNK_ROWS,
+            workers=config.MONTE_CARLO_WORKERS,
+            parallel_rows=config.MONTE_CARLO_PARALLEL_ROWS
+        )
+        if st.button("Run simulation"):
+            with st.spinner(f"Simulating {int(draws):,} scenarios..."):
+                st.session_state.simulation = (df, simulation_args, engine.simulate(**simulation_args))
+
+        saved = st.session_state.get('simulation')
+        if saved is not None and saved[0] is df and saved[1] == simulation_args:
+            simulation = saved[2]
+            band_cols = st.columns(2)
+            for band_col, (metric, label, fmt) in zip(band_cols, [
+                ('revenue_efficiency', "Total Revenue Efficiency", "{:,.2f}"),
+                ('loops_per_year', "Mean Capital Loops/Year", "{:.1f}x")
+            ]):
+                band = simulation['bands'][metric]
+                band_col.metric(f"{label} (P50)", fmt.format(band['p50']))
+                band_col.caption(f"P10 {fmt.format(band['p10'])} | P90 {fmt.format(band['p90'])}")
+            st.plotly_chart(visuals.simulation_bands(simulation), use_container_width=True)
+            if simulation['excluded_skus'].max():
+                st.caption(
+                    f"SKUs whose simulated cash cycle drops to zero days or below are left out of revenue efficiency "
+                    f"(about {simulation['excluded_skus'].mean():,.0f} per draw)"
+                )
+        elif saved is not None and saved[0] is df:
+            st.caption("Settings changed, run the simulation again to update the bands")
+
+def top_priorities(df):
+    # Top-K query over the indexed catalog (index built once per dataset)
+    index = st.session_state.get('priority_index')
+    if index is None or index.df is not df:
+        index = PriorityIndex(df)
+        st.session_state.priority_index = index
+
+    with st.expander("Top Priorities"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            k = st.number_input("Top K", min_value=1, max_value=max(1, len(df)), value=min(10, max(1, len(df))))
+        with col2:
+            categories = st.multiselect("Categories", sorted(index.categories, key=str), key='top_k_categories')
+        with col3:
+            flag = st.selectbox("Anomalies", ['All SKUs', 'Anomalies only', 'Exclude anomalies'])
+
+        ranges = {}
+        range_cols = st.columns(2)
+        for range_col, (column, label) in zip(range_cols, [
+            ('cash_cycle_days', "Cash cycle (days)"),
+            ('margin_per_unit', "Margin per unit ($)")
+        ]):
+            low, high = index.value_range(column)
+            if low < high:
+                selected = range_col.slider(label, low, high, (low, high), key=f"top_k_{column}")
+                if selected != (low, high): #untouched slider = no filter (keeps blanks in)
+                    ranges[column] = selected
+
+        top = index.top_k(
+            int(k),
+            categories=categories or None,
+            anomaly={'All SKUs': None, 'Anomalies only': True, 'Exclude anomalies': False}[flag],
+            **ranges
+        )
+        st.caption(f"{len(top):,} SKUs, priority_rank is the position in the whole catalog")
+        st.dataframe(top, hide_index=True)
 
 def insights_section():
     if st.session_state.data is None:
         return
 
     df = st.session_state.data
-    insights_engine = InsightsEngine(df) #Takes a data frame and collect insights by creating a dictionay(organized)
+    insights_engine = st.session_state.get('insights_engine')
+    if insights_engine is None or insights_engine.df is not df: #rules are evaluated once per dataset
+        insights_engine = InsightsEngine(df) #Takes a data frame and collect insights by creating a dictionay(organized)
+        st.session_state.insights_engine = insights_engine
 
     st.header("Insights")
+    top_priorities(df)
+
+    # Filters
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        priority_filter = st.multiselect("Priority", ['High', 'Medium', 'Low'])
+    with col2:
+        type_filter = st.multiselect("Action type", [rule['rule_id'] for rule in InsightsEngine.RULES])
+    with col3:
+        severity_filter = st.multiselect("Severity", ['critical', 'high', 'medium'])
+    with col4:
+        category_filter = st.multiselect("Category", sorted(df['category'].dropna().unique(), key=str))
+    with col5:
+        sort_order = st.selectbox("Sort by priority score", ['Highest first', 'Lowest first'])
+
+    positions = insights_engine.select_rows(
+        priorities=priority_filter,
+        action_types=type_filter,
+        severities=severity_filter,
+        categories=category_filter,
+        sort='desc' if sort_order == 'Highest first' else 'asc'
+    )
+
+    # Pagination - only the visible page gets expanders and action text
+    col1, col2 = st.columns(2)
+    with col1:
+        page_size = st.selectbox("SKUs per page", [10, 25, 50, 100], index=1)
+    with col2:
+        page_count = max(1, -(-len(positions) // page_size))
+        page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+
+    start = (page - 1) * page_size
+    page_positions = positions[start:start + page_size]
+    st.caption(f"Showing {start + 1 if len(page_positions) else 0}-{start + len(page_positions)} of {len(positions):,} SKUs")
 
     # Generate and display insights
-    insights = insights_engine.generate_insights()
+    insights = insights_engine.generate_insights(rows=page_positions)
 
     for insight in insights:
         with st.expander(f"{insight['sku']} ({insight['category']}) - Priority: {insight['priority']}"):
@@ -297,7 +521,9 @@ def insights_section():
     # Cash flow forecast
     st.subheader("Cash Flow Forecast")
     forecast = insights_engine.generate_cash_flow_forecast()
-    if forecast is not None:
+    if forecast is None:
+        st.error(f"Forecast failed: {insights_engine.forecast_error}")
+    else:
         import plotly.express as px
         fig = px.line(
             forecast,
@@ -322,6 +548,115 @@ def insights_section():
         )
         st.plotly_chart(fig, use_container_width=True)
 
+    # Per-category / top-SKU forecasts (fitted in parallel worker processes, only on request)
+    with st.expander("Category & Top SKU Forecasts"):
+        top_skus = st.number_input("Top SKUs by revenue", min_value=0, max_value=100, value=10, step=5)
+        if st.button("Run segment forecasts"):
+            with st.spinner("Fitting segment forecasts..."):
+                try:
+                    st.session_state.segment_forecasts = (df, insights_engine.generate_segment_forecasts(top_skus=top_skus))
+                except Exception as e:
+                    st.error(f"Segment forecast failed: {str(e)}")
+
+        saved = st.session_state.get('segment_forecasts')
+        if saved is not None and saved[0] is df:
+            segments = saved[1]
+            import plotly.express as px
+            st.plotly_chart(
+                px.line(
+                    segments,
+                    x='ds',
+                    y='yhat',
+                    color='series_id',
+                    line_dash='level',
+                    hover_data=['model'],
+                    labels={'ds': 'Date', 'yhat': 'Revenue', 'series_id': 'Series'}
+                ),
+                use_container_width=True
+            )
+
+
+def snapshot_panel():
+    # Save the processed dataset to disk / reopen a saved one (survives refreshes and restarts)
+    with st.sidebar.expander("Saved datasets"):
+        if st.session_state.data is not None:
+            source_name, fingerprint = st.session_state.get('source') or ('dataset', None)
+            name = st.text_input("Snapshot name", value=source_name)
+            if st.button("Save current dataset"):
+                meta = snapshot_store.save(st.session_state.data, name, fingerprint)
+                st.success(f"Saved {meta['rows']:,} rows ({meta['bytes'] / 2**20:,.1f} MB)")
+
+        snapshots = snapshot_store.list()
+        if not snapshots:
+            st.write("No saved datasets yet")
+            return
+        labels = {
+            meta['snapshot_id']: f"{meta['name']} | {meta['rows']:,} rows | {meta['created'][:16].replace('T', ' ')}"
+                                 + (" | older version" if meta['stale'] else "")
+            for meta in snapshots
+        }
+        snapshot_id = st.selectbox("Snapshot", list(labels), format_func=labels.get)
+        load_col, delete_col = st.columns(2)
+        if load_col.button("Load"):
+            df, meta = snapshot_store.load(snapshot_id) #memory-mapped, opens without re-processing
+            if meta['stale']:
+                st.warning("Saved by an older version of the app, metrics may differ from a fresh upload")
+            elif meta['source_fingerprint']:
+                dataset_cache.put(meta['source_fingerprint'], df) #uploading the same file again is a cache hit
+                st.session_state.dataset_key = (df, meta['source_fingerprint'])
+            st.session_state.data = df
+            st.session_state.source = (meta['name'], meta['source_fingerprint'])
+            st.rerun()
+        if delete_col.button("Delete"):
+            snapshot_store.delete(snapshot_id)
+            st.rerun()
+
+def debug_panel():
+    # Per-stage timings, only when INSTRUMENTATION=1
+    if not config.INSTRUMENTATION:
+        return
+    with st.sidebar.expander("Debug: stage timings"):
+        records = instrumentation.recent()
+        if not records:
+            st.write("No stages recorded yet")
+            return
+        timings = pd.DataFrame(records)
+        st.dataframe(
+            timings.groupby('stage').agg(
+                runs=('seconds', 'size'),
+                last_s=('seconds', 'last'),
+                total_s=('seconds', 'sum'),
+                rows=('rows', 'last'),
+                mem_delta_mb=('memory_delta_bytes', lambda b: b.iloc[-1] / 2**20)
+            ).sort_values('total_s', ascending=False)
+        )
+        st.caption(f"Log: {config.INSTRUMENTATION_LOG} | Prometheus: {config.INSTRUMENTATION_PROM}")
+
+        warm = warmup.timings()
+        if warm:
+            st.write("Background warm-up")
+            st.dataframe(pd.DataFrame.from_dict(warm, orient='index'))
+
+def memory_panel():
+    # What this session is holding on to (dataset, engines, cached results)
+    usage = session_memory(st.session_state)
+    with st.sidebar.expander("Session memory"):
+        st.metric("Total", f"{sum(usage.values()) / 2**20:,.1f} MB")
+        for key, size in usage.items():
+            if size:
+                st.write(f"{key}: {size / 2**20:,.1f} MB")
+
+def main():
+    show_onboarding_tour()
+    data_upload_section()
+    analysis_dashboard()
+    insights_section()
+    snapshot_panel()
+    memory_panel()
+    debug_panel()
+    if config.WARMUP:
+        warmup.start() #page is already drawn, load the heavy backends while the user reads it
+
 
 if __name__ == "__main__":
     main()
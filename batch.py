@@ -0,0 +1,147 @@
+"""Headless batch pipeline: CSV files in, enriched metrics / insights / forecasts out (no Streamlit)
+
+    python batch.py data/clients/ "exports/*.csv" --output results/ --workers 8
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from config import Config
+from modules.anomaly_model import AnomalyDetector
+from modules.data_processor import DataProcessor
+from modules.ingestion import CSVIngestor
+from modules.insights_engine import InsightsEngine
+
+def find_inputs(patterns):
+    """Expand directories (their *.csv files), globs and plain paths into a sorted, unique list"""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.update(glob.glob(os.path.join(pattern, '*.csv')))
+        else:
+            paths.update(path for path in glob.glob(pattern) if os.path.isfile(path))
+    return sorted(paths)
+
+def describe_error(error):
+    """Exception type and a readable message (str() of a KeyError is only the quoted key)"""
+    if isinstance(error, KeyError) and error.args:
+        message = f"missing column {error.args[0]}"
+    else:
+        message = str(error)
+    return f"{type(error).__name__}: {message}"
+
+def output_stems(paths):
+    """Output name per input: its path below the inputs' common directory, with separators flattened
+
+    in/a/x.csv and in/b/x.csv become a__x and b__x, so same-named files from different folders
+    don't overwrite each other's outputs
+    """
+    if not paths:
+        return {}
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+    return {
+        path: os.path.splitext(os.path.relpath(os.path.abspath(path), root))[0].replace(os.sep, '__')
+        for path in paths
+    }
+
+def process_file(path, output_dir, stem=None, chunksize=Config.INGEST_CHUNK_SIZE, engine=Config.INGEST_ENGINE, forecast=True):
+    """Run one file through the full pipeline and write its outputs. Returns a status row"""
+    started = time.perf_counter()
+    stem = stem or os.path.splitext(os.path.basename(path))[0]
+    outputs = {kind: os.path.join(output_dir, f"{stem}.{kind}.parquet") for kind in ['metrics', 'insights', 'forecast']}
+    status = {'file': path, 'status': 'ok', 'rows': 0, 'seconds': 0.0, 'error': None,
+              'metrics_path': None, 'insights_path': None, 'forecast_path': None}
+    try:
+        # One core per worker process; the pool already spreads files across cores
+        detector = AnomalyDetector(
+            contamination=Config.ANOMALY_CONTAMINATION,
+            n_jobs=1,
+            train_size=Config.ANOMALY_TRAIN_SIZE,
+            random_state=Config.ANOMALY_RANDOM_STATE,
+            model_dir=Config.ANOMALY_MODEL_DIR
+        )
+        ingestor = CSVIngestor(DataProcessor(detector=detector), chunksize=chunksize, engine=engine)
+        with open(path, 'rb') as f:
+            df = ingestor.ingest(f)
+        status['rows'] = len(df)
+        df.to_parquet(outputs['metrics'], index=False)
+        status['metrics_path'] = outputs['metrics']
+
+        insights_engine = InsightsEngine(df)
+        insights = insights_engine.evaluate_rules().copy()
+        insights['priority'] = insights_engine.priority_levels()[insights['row'].to_numpy()]
+        insights.to_parquet(outputs['insights'], index=False)
+        status['insights_path'] = outputs['insights']
+
+        if forecast:
+            result = insights_engine.generate_cash_flow_forecast()
+            if result is None:
+                status['status'] = 'partial'
+                status['error'] = f"Forecast failed: {insights_engine.forecast_error}"
+            else:
+                result.to_parquet(outputs['forecast'], index=False)
+                status['forecast_path'] = outputs['forecast']
+    except Exception as e:
+        status['status'] = 'failed'
+        status['error'] = describe_error(e)
+    status['seconds'] = round(time.perf_counter() - started, 3)
+    return status
+
+def run(paths, output_dir, workers=None, **options):
+    """Fan files out over a process pool and collect one status row per file"""
+    stems = output_stems(paths)
+    seen = {}
+    for path, stem in stems.items():
+        if stem in seen:
+            raise ValueError(f"{seen[stem]} and {path} would both write outputs named '{stem}'")
+        seen[stem] = path
+
+    os.makedirs(output_dir, exist_ok=True)
+    statuses = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = {pool.submit(process_file, path, output_dir, stem, **options): path for path, stem in stems.items()}
+        for future in as_completed(futures):
+            status = future.result()
+            statuses.append(status)
+            print(f"[{status['status']:>7}] {status['file']} ({status['rows']:,} rows, {status['seconds']:.1f}s)"
+                  + (f" - {status['error']}" if status['error'] else ''))
+
+    columns = ['file', 'status', 'rows', 'seconds', 'error', 'metrics_path', 'insights_path', 'forecast_path']
+    summary = pd.DataFrame(statuses, columns=columns).sort_values('file')
+    summary.to_csv(os.path.join(output_dir, 'summary.csv'), index=False)
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process business CSV exports without the Streamlit UI")
+    parser.add_argument('inputs', nargs='+', help="CSV files, directories or glob patterns")
+    parser.add_argument('-o', '--output', default='batch_output', help="Directory for the parquet outputs")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--chunksize', type=int, default=Config.INGEST_CHUNK_SIZE, help="Rows per CSV chunk")
+    parser.add_argument('--engine', choices=['pandas', 'pyarrow'], default=Config.INGEST_ENGINE, help="CSV parser")
+    parser.add_argument('--no-forecast', action='store_true', help="Skip the Prophet forecast")
+    args = parser.parse_args(argv)
+
+    paths = find_inputs(args.inputs)
+    if not paths:
+        parser.error("no input files matched")
+
+    try:
+        summary = run(
+            paths,
+            args.output,
+            workers=args.workers,
+            chunksize=args.chunksize,
+            engine=args.engine,
+            forecast=not args.no_forecast
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    failed = (summary['status'] == 'failed').sum()
+    print(f"{len(summary) - failed}/{len(summary)} files processed, summary in {os.path.join(args.output, 'summary.csv')}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
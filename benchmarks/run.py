@@ -0,0 +1,215 @@
+"""Time every pipeline stage on synthetic catalogs and write the results as JSON
+
+    python -m benchmarks.run                       # 1k, 100k and 1M rows
+    python -m benchmarks.run --sizes 1000 50000 --output before.json
+
+Each stage runs cold (fresh caches and anomaly model) so commits can be compared. The
+backends the app loads lazily are loaded first by the app's own warm-up steps, each reported
+as its own `warmup:<step>` row, so the first catalog size isn't charged for them.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from config import Config
+from benchmarks.synthetic import NUMERIC_COLUMNS, make_catalog
+from modules.anomaly_model import AnomalyDetector
+from modules.data_processor import DataProcessor, HeaderMappingCache
+from modules.industry_benchmarks import industry_benchmarks
+from modules.ingestion import normalize_columns
+from modules.insights_engine import InsightsEngine, forecast_cache
+from modules.priority_index import PriorityIndex
+from modules.rollup import CategoryRollup
+from modules.scenario_engine import ScenarioEngine
+from modules.visuals import Visualizations
+from modules import warmup
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+
+# What the app imports before it can draw the upload widget
+APP_MODULES = [
+    'modules.data_processor', 'modules.dataset_cache', 'modules.visuals', 'modules.insights_engine',
+    'modules.ingestion', 'modules.scenario_engine', 'modules.sample_generator'
+]
+
+# Stages that are impractically slow past this many rows (lift with --no-limits)
+STAGE_ROW_LIMITS = {
+    'scenario_simulation': 100_000
+}
+
+def measure(fn):
+    """Run fn once, return (result, seconds, peak traced MB)"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    try:
+        result = fn()
+    finally:
+        seconds = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, seconds, peak / 2**20
+
+def run_size(rows, seed, limits, large_data_threshold):
+    """All stages for one catalog size. Returns one record per stage"""
+    records = []
+    state = {}
+
+    def stage(name, fn, extra=None):
+        record = {'stage': name, 'rows': rows, 'status': 'ok', 'seconds': None, 'peak_mb': None, 'error': None}
+        if rows > limits.get(name, float('inf')):
+            record['status'] = 'skipped'
+        else:
+            try:
+                result, seconds, peak_mb = measure(fn)
+                record.update(seconds=round(seconds, 4), peak_mb=round(peak_mb, 2))
+                if extra:
+                    record.update(extra(result))
+            except Exception as e:
+                record.update(status='failed', error=f"{type(e).__name__}: {e}")
+        records.append(record)
+        print(f"{rows:>9,} {name:<28} {record['status']:<8} "
+              f"{record['seconds'] if record['seconds'] is not None else '-':>10} s "
+              f"{record['peak_mb'] if record['peak_mb'] is not None else '-':>10} MB")
+
+    processor = DataProcessor(
+        mapping_cache=HeaderMappingCache(),
+        detector=AnomalyDetector(
+            contamination=Config.ANOMALY_CONTAMINATION,
+            n_jobs=Config.ANOMALY_N_JOBS,
+            train_size=Config.ANOMALY_TRAIN_SIZE,
+            random_state=Config.ANOMALY_RANDOM_STATE
+        )
+    )
+    raw = normalize_columns(make_catalog(rows, seed=seed))
+
+    stage('standardize_columns', lambda: state.update(df=processor.standardize_columns(raw)))
+    if 'df' not in state:
+        return records
+
+    # The anomaly model can't take blanks, so rows with gaps are dropped first (not timed)
+    df = state['df'].dropna(subset=NUMERIC_COLUMNS).reset_index(drop=True)
+    stage('calculate_metrics', lambda: state.update(df=processor.calculate_metrics(df)))
+
+    df = state['df']
+    stage('generate_insights', lambda: InsightsEngine(df).generate_insights())
+    stage('priority_index', lambda: state.update(index=PriorityIndex(df)))
+    if 'index' in state:
+        stage('top_k_query', lambda: state['index'].top_k_positions(
+            10, anomaly=True, cash_cycle_days=(None, 30), margin_per_unit=(1, None)
+        ))
+
+    def forecast():
+        forecast_cache.clear()
+        engine = InsightsEngine(df)
+        result = engine.generate_cash_flow_forecast()
+        if result is None:
+            raise RuntimeError(engine.forecast_error)
+        return result
+    stage('generate_cash_flow_forecast', forecast)
+
+    stage('scenario_simulation', lambda: ScenarioEngine(df).simulate(
+        draws=Config.MONTE_CARLO_DRAWS,
+        seed=Config.MONTE_CARLO_SEED,
+        chunk_rows=Config.MONTE_CARLO_CHUNK_ROWS,
+        workers=Config.MONTE_CARLO_WORKERS,
+        parallel_rows=Config.MONTE_CARLO_PARALLEL_ROWS
+    ))
+
+    # Chart stages include JSON serialization, which is what the browser actually receives
+    large = len(df) > large_data_threshold
+    industry = industry_benchmarks.summary('retail', 'mid')
+    payload = lambda fig_json: {'payload_bytes': len(fig_json)}
+    stage('category_rollup', lambda: state.update(rollup=CategoryRollup(df, top_n=Config.ROLLUP_TOP_SKUS)))
+    if 'rollup' in state:
+        stage('cash_cycle_sunburst', lambda: Visualizations.cash_cycle_sunburst(state['rollup']).to_json(), payload)
+    stage('priority_matrix', lambda: Visualizations.priority_matrix(df, large=large).to_json(), payload)
+    stage('benchmark_comparison', lambda: Visualizations.benchmark_comparison(df, industry, large=large).to_json(), payload)
+    stage('percentile_ranks', lambda: industry_benchmarks.percentile_ranks(df, 'retail', 'mid'))
+    return records
+
+def cold_import(repeats=3):
+    """Fastest of `repeats` fresh interpreters importing the app modules (time-to-first-paint floor)"""
+    code = ("import time; started = time.perf_counter(); "
+            f"import {', '.join(APP_MODULES)}; print(time.perf_counter() - started)")
+    record = {'stage': 'cold_import', 'rows': None, 'status': 'ok', 'seconds': None, 'peak_mb': None, 'error': None}
+    try:
+        runs = [
+            float(subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout)
+            for _ in range(repeats)
+        ]
+        record['seconds'] = round(min(runs), 4)
+    except (OSError, ValueError, subprocess.CalledProcessError) as e:
+        record.update(status='failed', error=f"{type(e).__name__}: {e}")
+    print(f"{'-':>9} {'cold_import':<28} {record['status']:<8} "
+          f"{record['seconds'] if record['seconds'] is not None else '-':>10} s")
+    return record
+
+def load_backends():
+    """Run the warm-up steps (Plotly, scikit-learn, Prophet imports and first use) in this process"""
+    records = []
+    for step, fn in warmup.STEPS:
+        if step == 'forecast_workers':
+            continue #worker processes aren't part of any timed stage
+        name = f"warmup:{step}"
+        record = {'stage': name, 'rows': None, 'status': 'ok', 'seconds': None, 'peak_mb': None, 'error': None}
+        try:
+            started = time.perf_counter() #not traced, tracemalloc slows imports several times over
+            fn()
+            record['seconds'] = round(time.perf_counter() - started, 4)
+        except Exception as e: #e.g. Prophet not installed
+            record.update(status='failed', error=f"{type(e).__name__}: {e}")
+        records.append(record)
+        print(f"{'-':>9} {name:<28} {record['status']:<8} "
+              f"{record['seconds'] if record['seconds'] is not None else '-':>10} s")
+    return records
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on synthetic catalogs")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Catalog sizes (rows)")
+    parser.add_argument('--seed', type=int, default=0, help="Synthetic catalog seed")
+    parser.add_argument('--output', default=None, help="Results file (default: benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument('--no-limits', action='store_true', help="Run every stage at every size")
+    args = parser.parse_args(argv)
+
+    env = environment()
+    records = [cold_import()]
+    records.extend(load_backends()) #before any timed stage, so no size pays for them
+    for rows in args.sizes:
+        records.extend(run_size(rows, args.seed, {} if args.no_limits else STAGE_ROW_LIMITS, Config.LARGE_DATA_THRESHOLD))
+
+    output = args.output
+    if output is None:
+        stamp = env['timestamp'].replace(':', '').replace('+0000', 'Z')
+        output = os.path.join('benchmarks', 'results', f"{(env['commit'] or 'nogit')[:10]}-{stamp}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({'environment': env, 'seed': args.seed, 'sizes': args.sizes, 'results': records}, f, indent=2)
+    print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Seeded synthetic catalogs shaped like real client exports (skewed values, messy headers, gaps)"""
+import numpy as np
+import pandas as pd
+
+# Header spellings seen in client files, all of which normalize_columns + fuzzy matching resolve
+HEADER_VARIANTS = {
+    'sku': ['sku', 'SKU', ' Sku '],
+    'category': ['category', 'Category', 'CATEGORY'],
+    'inventory_days': ['inventory_days', 'Inventory Days', 'InventoryDays', 'inventory days'],
+    'units_sold': ['units_sold', 'Units Sold', 'UnitsSold', 'units sold'],
+    'unit_cost': ['unit_cost', 'Unit Cost', 'UnitCost', 'unit cost'],
+    'unit_price': ['unit_price', 'Unit Price', 'UnitPrice', 'unit price'],
+    'customer_payment_days': ['customer_payment_days', 'Customer Payment Days', 'CustomerPaymentDays'],
+    'supplier_payment_days': ['supplier_payment_days', 'Supplier Payment Days', 'SupplierPaymentDays']
+}
+
+NUMERIC_COLUMNS = [
+    'inventory_days', 'units_sold', 'unit_cost', 'unit_price',
+    'customer_payment_days', 'supplier_payment_days'
+]
+
+def make_catalog(rows, seed=0, n_categories=40, nan_rate=0.01, messy_headers=True):
+    """A catalog of `rows` SKUs. Same (rows, seed, ...) always gives the same frame"""
+    rng = np.random.default_rng(seed)
+
+    # A few categories hold most SKUs (Zipf-like)
+    weights = 1 / np.arange(1, n_categories + 1)
+    categories = rng.choice([f"Category {i}" for i in range(n_categories)], size=rows, p=weights / weights.sum())
+
+    unit_price = np.round(rng.lognormal(mean=3.0, sigma=0.8, size=rows), 2)
+    unit_cost = np.round(unit_price * rng.beta(6, 3, size=rows), 2) #mostly 50-80% of price, some near zero margin
+    df = pd.DataFrame({
+        'sku': [f"SKU-{i:07d}" for i in range(rows)],
+        'category': categories,
+        'inventory_days': np.round(rng.gamma(shape=3.0, scale=15.0, size=rows)).astype(int),
+        'units_sold': rng.negative_binomial(2, 0.01, size=rows),
+        'unit_cost': unit_cost,
+        'unit_price': unit_price,
+        'customer_payment_days': rng.choice([0, 15, 30, 45, 60, 90], size=rows, p=[.1, .2, .35, .15, .15, .05]),
+        'supplier_payment_days': rng.choice([15, 30, 45, 60], size=rows, p=[.2, .45, .2, .15])
+    })
+
+    if nan_rate:
+        for col in NUMERIC_COLUMNS: #blank cells, as in hand-edited exports
+            df.loc[rng.random(rows) < nan_rate, col] = np.nan
+
+    if messy_headers:
+        df.columns = [rng.choice(HEADER_VARIANTS[col]) for col in df.columns]
+    return df
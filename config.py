@@ -8,16 +8,71 @@ class Config:
     PLOTLY_USERNAME = os.getenv('PLOTLY_USERNAME')
     PLOTLY_API_KEY = os.getenv('PLOTLY_API_KEY')
     
-    # Industry benchmarks
-    INDUSTRY_BENCHMARKS = {
-        'retail': {
-            'inventory_days': 45,
-            'payment_gap': 15,
-            'loops_per_year': 8
-        },
-        'manufacturing': {
-            'inventory_days': 60,
-            'payment_gap': 30,
-            'loops_per_year': 6
-        }
-    }
\ No newline at end of file
+    # Industry benchmarks: quantiles per industry, company size and metric. The bundled file holds
+    # illustrative placeholder figures, point BENCHMARK_DATA_PATH at real data to replace them
+    SAMPLE_BENCHMARK_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'industry_benchmarks.csv')
+    BENCHMARK_DATA_PATH = os.getenv('BENCHMARK_DATA_PATH', SAMPLE_BENCHMARK_DATA_PATH)
+
+    # Forecast cache (set FORECAST_CACHE_DIR to keep fitted forecasts across restarts)
+    FORECAST_CACHE_SIZE = int(os.getenv('FORECAST_CACHE_SIZE', 32))
+    FORECAST_CACHE_DIR = os.getenv('FORECAST_CACHE_DIR')
+
+    # Chunked CSV ingestion ('pyarrow' engine needs pyarrow installed)
+    INGEST_CHUNK_SIZE = int(os.getenv('INGEST_CHUNK_SIZE', 100_000))
+    INGEST_ENGINE = os.getenv('INGEST_ENGINE', 'pandas')
+
+    # Header -> column mapping cache (set COLUMN_MAPPING_CACHE_PATH to persist it as JSON)
+    COLUMN_MAPPING_CACHE_SIZE = int(os.getenv('COLUMN_MAPPING_CACHE_SIZE', 256))
+    COLUMN_MAPPING_CACHE_PATH = os.getenv('COLUMN_MAPPING_CACHE_PATH')
+
+    # Anomaly detection (ANOMALY_MODEL_DIR keeps fitted models across restarts)
+    ANOMALY_CONTAMINATION = float(os.getenv('ANOMALY_CONTAMINATION', 0.1))
+    ANOMALY_N_JOBS = int(os.getenv('ANOMALY_N_JOBS', -1))
+    ANOMALY_TRAIN_SIZE = int(os.getenv('ANOMALY_TRAIN_SIZE', 0)) or None #0 = train on every row
+    ANOMALY_RANDOM_STATE = int(os.getenv('ANOMALY_RANDOM_STATE', 42))
+    ANOMALY_MAX_MODELS = int(os.getenv('ANOMALY_MAX_MODELS', 8))
+    ANOMALY_MODEL_DIR = os.getenv('ANOMALY_MODEL_DIR')
+
+    # Charts switch to WebGL / binned summaries above this many SKUs
+    LARGE_DATA_THRESHOLD = int(os.getenv('LARGE_DATA_THRESHOLD', 5000))
+
+    # Per-category / top-SKU forecasts (series shorter than MIN_POINTS use exponential smoothing)
+    SEGMENT_FORECAST_MIN_POINTS = int(os.getenv('SEGMENT_FORECAST_MIN_POINTS', 10))
+    SEGMENT_FORECAST_TIME_BUDGET = float(os.getenv('SEGMENT_FORECAST_TIME_BUDGET', 30))
+    SEGMENT_FORECAST_WORKERS = int(os.getenv('SEGMENT_FORECAST_WORKERS', 0)) or None #0 = all cores
+
+    # Sample-data generator (HF_MODEL_URL can point at a local stub server)
+    HF_MODEL_URL = os.getenv('HF_MODEL_URL', 'https://api-inference.huggingface.co/models/mistralai/Mixtral-8x7B-Instruct-v0.1')
+    HF_CONNECT_TIMEOUT = float(os.getenv('HF_CONNECT_TIMEOUT', 5))
+    HF_READ_TIMEOUT = float(os.getenv('HF_READ_TIMEOUT', 60))
+    HF_RETRIES = int(os.getenv('HF_RETRIES', 3))
+    HF_CACHE_DIR = os.getenv('HF_CACHE_DIR', '.cache/hf_responses') #empty string disables the cache
+
+    # Stage instrumentation (INSTRUMENTATION=1 turns it on; off costs nothing)
+    INSTRUMENTATION = os.getenv('INSTRUMENTATION', '0') == '1'
+    INSTRUMENTATION_LOG = os.getenv('INSTRUMENTATION_LOG', 'metrics/stages.jsonl')
+    INSTRUMENTATION_PROM = os.getenv('INSTRUMENTATION_PROM', 'metrics/stages.prom')
+
+    # Compact dtypes for the per-session dataset (MEMORY_OPTIMIZED=0 keeps pandas defaults)
+    MEMORY_OPTIMIZED = os.getenv('MEMORY_OPTIMIZED', '1') == '1'
+
+    # Processed datasets shared across sessions (LRU within this memory budget)
+    DATASET_CACHE_BUDGET_MB = int(os.getenv('DATASET_CACHE_BUDGET_MB', 1024))
+
+    # Category rollup: SKUs shown per category before the rest go into "Other"
+    ROLLUP_TOP_SKUS = int(os.getenv('ROLLUP_TOP_SKUS', 20))
+
+    # Monte Carlo scenarios (fixed seed = same bands for the same data and settings)
+    MONTE_CARLO_DRAWS = int(os.getenv('MONTE_CARLO_DRAWS', 2000))
+    MONTE_CARLO_SEED = int(os.getenv('MONTE_CARLO_SEED', 42))
+    MONTE_CARLO_CHUNK_ROWS = int(os.getenv('MONTE_CARLO_CHUNK_ROWS', 50_000))
+    MONTE_CARLO_PARALLEL_ROWS = int(os.getenv('MONTE_CARLO_PARALLEL_ROWS', 200_000)) #bigger catalogs use worker processes
+    MONTE_CARLO_WORKERS = int(os.getenv('MONTE_CARLO_WORKERS', 0)) or None #0 = one per CPU
+
+    # Saved dataset snapshots (Arrow files, reopened through a memory map)
+    SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR', 'snapshots')
+
+    # Load Prophet / scikit-learn / Plotly in the background after the first page (WARMUP=0 to skip)
+    WARMUP = os.getenv('WARMUP', '1') == '1'
+    # Also start the segment forecast worker pool during warm-up (one process per worker, so opt-in)
+    WARMUP_FORECAST_WORKERS = os.getenv('WARMUP_FORECAST_WORKERS', '0') == '1'
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import joblib
+import numpy as np
+import pandas as pd
+from modules.caching import LRUCache, atomic_write
+
+class AnomalyDetector:
+    """Seeded IsolationForest that is fitted once per dataset fingerprint and reused after that"""
+
+    def __init__(self, contamination=0.1, n_jobs=None, train_size=None, random_state=42,
+                 max_models=8, model_dir=None):
+        self.contamination = contamination
+        self.n_jobs = n_jobs #-1 fits the trees on every core
+        self.train_size = train_size #fit on at most this many rows (None = all rows)
+        self.random_state = random_state
+        self.max_models = max_models
+        self.model_dir = model_dir
+        self._models = LRUCache(max_models)
+        self._labels = LRUCache(max_models) #labels of the training data itself, per fingerprint
+        if model_dir:
+            os.makedirs(model_dir, exist_ok=True)
+
+    def settings(self):
+        return {
+            'contamination': self.contamination,
+            'train_size': self.train_size,
+            'random_state': self.random_state
+        }
+
+    def fingerprint(self, X):
+        """Content hash of the training columns plus everything that changes the fit
+
+        Values are hashed as float64, so compact_frame downcasting the same numbers keeps the key
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps(list(map(str, X.columns))).encode())
+        digest.update(pd.util.hash_pandas_object(X.astype(np.float64), index=False).values.tobytes())
+        digest.update(json.dumps(self.settings(), sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def fit(self, X, key=None):
+        """Return the model for this data, fitting it only if the fingerprint is new"""
+        key = key or self.fingerprint(X)
+        model = self._get(key)
+        if model is None:
+            from sklearn.ensemble import IsolationForest #heavy, only loaded once a model is needed
+            model = IsolationForest(
+                contamination=self.contamination,
+                n_jobs=self.n_jobs,
+                random_state=self.random_state
+            )
+            model.fit(self._training_rows(X))
+            self._put(key, model)
+        return model
+
+    def fit_predict(self, X):
+        """Labels for X (1 normal, -1 anomaly) from the model fitted on X"""
+        key = self.fingerprint(X)
+        labels = self._labels.get(key)
+        if labels is None:
+            labels = self.fit(X, key).predict(X).astype(np.int8)
+            self._labels.put(key, labels)
+        return labels.copy()
+
+    def score(self, X, model):
+        """Label new or modified rows with an already fitted model instead of refitting"""
+        return model.predict(X[list(model.feature_names_in_)])
+
+    def _training_rows(self, X):
+        if self.train_size is None or len(X) <= self.train_size:
+            return X
+        rng = np.random.default_rng(self.random_state)
+        rows = np.sort(rng.choice(len(X), size=self.train_size, replace=False))
+        return X.iloc[rows]
+
+    def _get(self, key):
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        path = self._path(key)
+        if path and os.path.exists(path):
+            try:
+                model = load_model(path)
+            except Exception:
+                return None #unreadable file, refit
+            self._models.put(key, model)
+            return model
+        return None
+
+    def _put(self, key, model):
+        self._models.put(key, model)
+        path = self._path(key)
+        if path:
+            save_model(model, path)
+
+    def _path(self, key):
+        if not self.model_dir:
+            return None
+        return os.path.join(self.model_dir, f"{key}.joblib")
+
+def save_model(model, path):
+    atomic_write(path, lambda tmp_path: joblib.dump(model, tmp_path))
+
+def load_model(path):
+    return joblib.load(path)
@@ -1,26 +1,142 @@
+import json
+import os
+from functools import partial
 import pandas as pd
 import numpy as np
-from fuzzywuzzy import process
-from sklearn.ensemble import IsolationForest
+from fuzzywuzzy import fuzz, utils
+from config import Config
+from modules.anomaly_model import AnomalyDetector
+from modules.caching import LRUCache, atomic_write
+from modules.instrumentation import timed
+
+class HeaderMappingCache:
+    """LRU map from a header signature (tuple of column names) to its resolved rename map"""
+
+    def __init__(self, max_entries=256, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self._entries = LRUCache(max_entries)
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    for key, mapping in json.load(f):
+                        self._entries.put(key, mapping)
+            except (OSError, ValueError):
+                self._entries.clear() #unreadable store, start empty
+
+    @staticmethod
+    def signature(columns, candidates, threshold):
+        # The trailing version drops maps saved before duplicate matches were resolved
+        return json.dumps([list(columns), list(candidates), threshold, 2], default=str)
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def put(self, key, mapping):
+        self._entries.put(key, mapping)
+        if self.path:
+            self._save()
+
+    def _save(self):
+        entries = self._entries.items()
+        def write(tmp_path):
+            with open(tmp_path, 'w') as f:
+                json.dump(entries, f)
+        atomic_write(self.path, write)
+
+# Bump when a change alters processed output, so cached/saved datasets are rebuilt
+PROCESSING_VERSION = 1
+
+# Shared across DataProcessor instances so repeat header layouts skip fuzzy matching
+header_mapping_cache = HeaderMappingCache(Config.COLUMN_MAPPING_CACHE_SIZE, Config.COLUMN_MAPPING_CACHE_PATH)
+
+# Shared so a dataset's anomaly model is fitted once, not on every upload or rerun
+anomaly_detector = AnomalyDetector(
+    contamination=Config.ANOMALY_CONTAMINATION,
+    n_jobs=Config.ANOMALY_N_JOBS,
+    train_size=Config.ANOMALY_TRAIN_SIZE,
+    random_state=Config.ANOMALY_RANDOM_STATE,
+    max_models=Config.ANOMALY_MAX_MODELS,
+    model_dir=Config.ANOMALY_MODEL_DIR
+)
 
 class DataProcessor:
-    def __init__(self):
+    MATCH_THRESHOLD = 70
+    PRIORITY_WEIGHTS = {
+        'revenue_efficiency': 0.4,
+        'loops_per_year': 0.3,
+        'margin_per_unit': 0.3
+    }
+
+    # Computed by calculate_metrics, never taken from an input file
+    DERIVED_COLUMNS = [
+        'margin_per_unit', 'revenue', 'profit', 'cash_cycle_days',
+        'loops_per_year', 'revenue_efficiency', 'anomaly', 'priority_score'
+    ]
+
+    def __init__(self, mapping_cache=None, detector=None):
         self.required_columns = [
             'units_sold', 'unit_price', 'unit_cost',
             'inventory_days', 'customer_payment_days', 'supplier_payment_days'
         ]
+        self.mapping_cache = header_mapping_cache if mapping_cache is None else mapping_cache
+        self.anomaly_detector = anomaly_detector if detector is None else detector
     
+    @timed('standardize_columns')
     def standardize_columns(self, df):
         """Fuzzy column name matching"""
-        standardized = {}
-        for col in df.columns:
-            match, score = process.extractOne(col.lower(), [x.lower() for x in self.required_columns])
-            if score > 70:
-                standardized[col] = match
+        key = self.mapping_cache.signature(df.columns, self.required_columns, self.MATCH_THRESHOLD)
+        positions = self.mapping_cache.get(key)
+        if positions is None:
+            positions = self._match_columns(list(df.columns))
+            self.mapping_cache.put(key, positions)
+
+        # Cached by column position so the map survives the JSON round trip
+        standardized = {df.columns[i]: match for i, match in positions}
         return df.rename(columns=standardized)
+
+    def _match_columns(self, columns):
+        """Score every column against every candidate in one matrix, return [(position, match)]"""
+        if not columns:
+            return []
+        candidates = [x.lower() for x in self.required_columns]
+
+        # Same preprocessing fuzzywuzzy's process.extractOne applies to query and choices
+        ascii_process = partial(utils.full_process, force_ascii=True)
+        processed_candidates = [ascii_process(c) for c in candidates]
+        queries = [ascii_process(utils.full_process(col.lower())) for col in columns]
+
+        unique_queries = list(dict.fromkeys(queries)) #score each distinct header once
+        scores = np.array([
+            [fuzz.WRatio(q, c, full_process=False) for c in processed_candidates]
+            for q in unique_queries
+        ])
+        best = scores.argmax(axis=1) #first best candidate wins ties, like extractOne
+        best_score = scores[np.arange(len(unique_queries)), best]
+        resolved = {
+            q: (candidates[b], score) for q, b, score in zip(unique_queries, best, best_score)
+            if score > self.MATCH_THRESHOLD
+        }
+
+        # Two headers resolving to the same name: the higher score keeps it (first on ties),
+        # the other stays unmapped instead of producing a duplicate column
+        claimed = {}
+        for i, q in enumerate(queries):
+            if q in resolved:
+                match, score = resolved[q]
+                if match not in claimed or score > claimed[match][1]:
+                    claimed[match] = (i, score)
+        return sorted([i, match] for match, (i, score) in claimed.items())
     
     def calculate_metrics(self, df):
         """Compute all business metrics"""
+        df = self.calculate_row_metrics(df)
+        df = self.detect_anomalies(df)
+        return df
+
+    @timed('row_metrics')
+    def calculate_row_metrics(self, df):
+        """Metrics that only depend on their own row (safe to compute chunk by chunk)"""
         df['margin_per_unit'] = df['unit_price'] - df['unit_cost']
         df['revenue'] = df['units_sold'] * df['unit_price']
         df['profit'] = df['units_sold'] * df['margin_per_unit']
@@ -32,20 +148,81 @@ class DataProcessor:
         df['loops_per_year'] = 365 / df['cash_cycle_days'].clip(lower=1)
         df['revenue_efficiency'] = df['revenue'] / df['cash_cycle_days']
         
-        # Anomaly detection
-        clf = IsolationForest(contamination=0.1)
-        df['anomaly'] = clf.fit_predict(df[self.required_columns])
-        
         # Priority scoring
-        weights = {
-            'revenue_efficiency': 0.4,
-            'loops_per_year': 0.3,
-            'margin_per_unit': 0.3
-        }
+        weights = self.PRIORITY_WEIGHTS
         df['priority_score'] = (
             df['revenue_efficiency'] * weights['revenue_efficiency'] +
             df['loops_per_year'] * weights['loops_per_year'] +
             df['margin_per_unit'] * weights['margin_per_unit']
         )
         
-        return df
\ No newline at end of file
+        return df
+
+    @timed('upsert')
+    def upsert(self, df, delta, model=None):
+        """Merge a delta of new/updated SKUs into a processed df, recomputing only the touched rows
+
+        Updated SKUs stay where they are (blank delta cells keep the old value), new SKUs are
+        appended. Touched rows are labelled by `model` (default: the model fitted on df), so the
+        anomaly model is not refitted and untouched rows keep their labels.
+        Returns (merged, positions of the touched rows in merged)
+        """
+        model = self.anomaly_model(df) if model is None else model
+        delta = delta.drop_duplicates('sku', keep='last').reset_index(drop=True)
+        inputs = [col for col in df.columns if col not in self.DERIVED_COLUMNS]
+
+        # Last row wins if the existing data repeats a sku
+        keys = pd.Series(np.arange(len(df)), index=df['sku'].astype(str).to_numpy())
+        keys = keys[~keys.index.duplicated(keep='last')]
+        found = keys.reindex(delta['sku'].astype(str).to_numpy()).to_numpy()
+        is_new = np.isnan(found)
+        updated = found[~is_new].astype(np.int64)
+
+        touched = df.iloc[updated][inputs].reset_index(drop=True)
+        changes = delta[~is_new].reset_index(drop=True)
+        for col in inputs:
+            if col in changes.columns:
+                touched[col] = changes[col].fillna(touched[col])
+        touched = pd.concat([touched, delta.loc[is_new, [c for c in inputs if c in delta.columns]]],
+                            ignore_index=True)
+
+        touched = self.calculate_row_metrics(touched)
+        touched['anomaly'] = self.anomaly_detector.score(touched[self.required_columns], model).astype(np.int8)
+        df, touched = self._match_dtypes(df, touched[df.columns])
+
+        # Touched rows replace their originals in place, new ones go at the end
+        order = np.arange(len(df) + is_new.sum())
+        order[updated] = len(df) + np.arange(len(updated))
+        order[len(df):] = len(df) + len(updated) + np.arange(is_new.sum())
+        merged = pd.concat([df, touched], ignore_index=True).take(order).reset_index(drop=True)
+        positions = np.concatenate([updated, np.arange(len(df), len(merged))])
+        return merged, positions
+
+    @staticmethod
+    def _match_dtypes(df, rows):
+        """Give new rows df's dtypes so concatenating them doesn't fall back to object/float64"""
+        for col in df.columns:
+            dtype = df[col].dtype
+            if isinstance(dtype, pd.CategoricalDtype):
+                new = pd.Index(rows[col].dropna().unique()).difference(dtype.categories)
+                if len(new):
+                    df = df.assign(**{col: df[col].cat.add_categories(new)}) #appended, so codes are unchanged
+                rows[col] = rows[col].astype(df[col].dtype)
+            elif dtype.kind == 'f' or isinstance(dtype, pd.StringDtype) or \
+                    (dtype.kind in 'iu' and rows[col].notna().all()):
+                rows[col] = rows[col].astype(dtype)
+        return df, rows
+
+    def anomaly_model(self, df):
+        """The fitted anomaly model for this dataset (reused, not refitted)"""
+        return self.anomaly_detector.fit(df[self.required_columns])
+
+    @timed('anomaly_detection')
+    def detect_anomalies(self, df):
+        """Anomaly detection over the whole table (needs every row at once)"""
+        labels = self.anomaly_detector.fit_predict(df[self.required_columns])
+        if 'anomaly' in df.columns:
+            df['anomaly'] = labels
+        else:
+            df.insert(df.columns.get_loc('priority_score'), 'anomaly', labels) #keep the original column order
+        return df
@@ -0,0 +1,80 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from config import Config
+from modules.memory import frame_bytes
+
+class DatasetCache:
+    """Process-wide LRU of processed datasets keyed by file content + processing config
+
+    Shared by every session in the process. Callers get a shallow copy: a new frame
+    object over the same column data. Assigning columns never touches the cached frame,
+    and with pandas copy-on-write (enabled in app.py) neither do in-place edits.
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict() #key -> (df, nbytes)
+        self._total = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    @staticmethod
+    def fingerprint(file, settings, block_size=8 << 20):
+        """sha256 of the file bytes plus the processing settings (file position is restored to 0)"""
+        digest = hashlib.sha256()
+        file.seek(0)
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+        file.seek(0)
+        digest.update(json.dumps(settings, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key][0].copy(deep=False)
+
+    def put(self, key, df):
+        size = frame_bytes(df)
+        with self._lock:
+            if size > self.budget_bytes:
+                return #bigger than the whole budget, not worth evicting everything for
+            if key in self._entries:
+                self._total -= self._entries.pop(key)[1]
+            self._entries[key] = (df, size)
+            self._total += size
+            while self._total > self.budget_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False) #least recently used first
+                self._total -= evicted
+
+    def get_or_process(self, key, process):
+        """Cached frame for key, or run process() once even if several sessions ask at the same time"""
+        cached = self.get(key)
+        if cached is not None:
+            return cached, True
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        try:
+            with key_lock:
+                cached = self.get(key) #another session may have finished it while we waited
+                if cached is not None:
+                    return cached, True
+                df = process()
+                self.put(key, df)
+        finally: #also when process() fails, so failed keys don't pile up
+            with self._lock:
+                if self._key_locks.get(key) is key_lock:
+                    del self._key_locks[key]
+        return df.copy(deep=False), False
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._total, 'budget_bytes': self.budget_bytes}
+
+# One per process, shared by every Streamlit session
+dataset_cache = DatasetCache(Config.DATASET_CACHE_BUDGET_MB * 2**20)
@@ -0,0 +1,56 @@
+import hashlib
+import json
+import os
+import pandas as pd
+from modules.caching import LRUCache, atomic_write
+
+class ForecastCache:
+    """LRU cache of fitted forecasts keyed on a hash of the input series + model settings"""
+
+    def __init__(self, max_entries=32, cache_dir=None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries = LRUCache(max_entries)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def fingerprint(series_df, settings):
+        """Content hash of the (ds, y) frame and the model settings"""
+        digest = hashlib.sha256()
+        digest.update(pd.util.hash_pandas_object(series_df, index=False).values.tobytes())
+        digest.update(json.dumps(settings, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return {'params', 'forecast'} for key, checking memory first and then disk"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+
+        path = self._path(key)
+        if path and os.path.exists(path):
+            try:
+                entry = pd.read_pickle(path)
+            except Exception:
+                return None #corrupt or partial file, treat as a miss
+            self._entries.put(key, entry)
+            return entry
+        return None
+
+    def put(self, key, params, forecast):
+        entry = {'params': params, 'forecast': forecast}
+        self._entries.put(key, entry)
+
+        path = self._path(key)
+        if path:
+            atomic_write(path, lambda tmp_path: pd.to_pickle(entry, tmp_path))
+        return entry
+
+    def clear(self):
+        self._entries.clear()
+
+    def _path(self, key):
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, f"{key}.pkl")
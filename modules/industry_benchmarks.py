@@ -0,0 +1,83 @@
+"""Industry benchmark distributions and per-SKU percentile ranks
+
+The data file has one row per (industry, size, metric) with the metric's quantiles in
+columns p0..p100. Quantiles are sorted once and cached per (industry, size), so switching
+industries is a dict lookup. Ranking a catalog is one np.interp per metric over the whole
+column: a SKU's rank is the share of the industry it beats on the raw value (0-100).
+"""
+import re
+import threading
+import numpy as np
+import pandas as pd
+from config import Config
+
+class IndustryBenchmarks:
+    def __init__(self, path):
+        self.path = path
+        self._table = None
+        self._sorted = {} #(industry, size) -> {metric: (sorted quantile values, percentiles)}
+        self._lock = threading.Lock()
+
+    @property
+    def table(self):
+        if self._table is None:
+            with self._lock:
+                if self._table is None:
+                    self._table = pd.read_csv(self.path)
+        return self._table
+
+    def industries(self):
+        return list(dict.fromkeys(self.table['industry']))
+
+    def sizes(self, industry):
+        return list(dict.fromkeys(self.table.loc[self.table['industry'] == industry, 'size']))
+
+    def distributions(self, industry, size):
+        """{metric: (quantile values ascending, their percentiles)} for one industry and size"""
+        key = (industry, size)
+        if key not in self._sorted:
+            rows = self.table[(self.table['industry'] == industry) & (self.table['size'] == size)]
+            if rows.empty:
+                raise KeyError(f"No benchmarks for {industry} ({size})")
+            quantile_columns = [col for col in rows.columns if re.fullmatch(r'p\d+(\.\d+)?', col)]
+            percentiles = np.array([float(col[1:]) for col in quantile_columns])
+            order = np.argsort(percentiles)
+            distributions = {}
+            for metric, values in zip(rows['metric'], rows[quantile_columns].to_numpy(dtype=float)):
+                distributions[metric] = (np.sort(values[order]), percentiles[order]) #sort guards hand-edited files
+            with self._lock:
+                self._sorted[key] = distributions
+        return self._sorted[key]
+
+    def summary(self, industry, size):
+        """{metric: {'p25', 'median', 'p75'}} for drawing benchmark bands"""
+        return {
+            metric: dict(zip(['p25', 'median', 'p75'], np.interp([25, 50, 75], percentiles, values).tolist()))
+            for metric, (values, percentiles) in self.distributions(industry, size).items()
+        }
+
+    def percentile_ranks(self, df, industry, size):
+        """Per-SKU percentile (0-100) of each metric within the industry distribution, NaN stays NaN"""
+        columns = {
+            'inventory_days': df['inventory_days'],
+            'payment_gap': df['customer_payment_days'] - df['supplier_payment_days'],
+            'loops_per_year': df['loops_per_year']
+        }
+        ranks = {}
+        for metric, (values, percentiles) in self.distributions(industry, size).items():
+            if metric in columns:
+                ranks[f"{metric}_pct"] = np.interp( #clamped to 0 / 100 outside the distribution
+                    columns[metric].to_numpy(dtype=float), values, percentiles
+                ).astype(np.float32)
+        return pd.DataFrame(ranks, index=df.index)
+
+def ordinal(value):
+    """Rounded percentile with its English suffix: 1st, 2nd, 3rd, 11th, 22nd, 62nd ('n/a' for NaN)"""
+    if pd.isna(value):
+        return 'n/a'
+    n = int(round(value))
+    suffix = 'th' if 10 <= n % 100 <= 20 else {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')
+    return f"{n}{suffix}"
+
+# Loaded on first use and shared by every session
+industry_benchmarks = IndustryBenchmarks(Config.BENCHMARK_DATA_PATH)
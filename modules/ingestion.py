@@ -0,0 +1,154 @@
+import io
+import os
+import pandas as pd
+from modules.data_processor import DataProcessor
+from modules.instrumentation import stage, timed
+
+# Compact dtypes for the raw input columns. Money stays float64 so revenue totals don't drift, and
+# day counts stay float64 so fractional days print as typed in insight text ("52.3", not "52.29999923706055").
+# compact_frame still stores whole-number day columns as float32 afterwards
+INPUT_DTYPES = {
+    'units_sold': 'float32',
+    'inventory_days': 'float64',
+    'customer_payment_days': 'float64',
+    'supplier_payment_days': 'float64',
+    'unit_cost': 'float64',
+    'unit_price': 'float64'
+}
+
+def normalize_columns(df):
+    # First pass normalization
+    df.columns = [str(col).strip().lower().replace(' ', '_') for col in df.columns] #Help organize columns
+
+    # Specific column mappings
+    column_mappings = {
+        'sku': 'sku',
+        'category': 'category',
+        'inventorydays': 'inventory_days',
+        'unitssold': 'units_sold',
+        'unitcost': 'unit_cost',
+        'unitprice': 'unit_price',
+        'customerpaymentdays': 'customer_payment_days',
+        'supplierpaymentdays': 'supplier_payment_days'
+    }
+
+    # Apply specific mappings
+    for original, new in column_mappings.items():
+        if original in df.columns and new not in df.columns:
+            df.rename(columns={original: new}, inplace=True)
+
+    return df
+
+class CSVIngestor:
+    """Streams a CSV in fixed-size chunks so peak memory follows chunk size, not file size"""
+
+    def __init__(self, data_processor=None, chunksize=100_000, engine='pandas',
+                 block_size=16 << 20, dtypes=None):
+        self.data_processor = data_processor or DataProcessor()
+        self.chunksize = chunksize
+        self.engine = engine #'pandas' or 'pyarrow'
+        self.block_size = block_size #bytes per batch for the pyarrow reader
+        self.dtypes = INPUT_DTYPES if dtypes is None else dtypes
+
+    def resolve_columns(self, raw_columns):
+        """Run the header (only) through normalize + fuzzy matching to get the final names"""
+        header = pd.DataFrame(columns=list(raw_columns))
+        header = normalize_columns(header)
+        header = self.data_processor.standardize_columns(header)
+
+        columns = list(header.columns)
+        first = {}
+        for raw, col in zip(raw_columns, columns):
+            if col in first:
+                raise ValueError(f"Columns '{first[col]}' and '{raw}' both map to '{col}', rename one of them")
+            first[col] = raw
+        return columns
+
+    @timed('csv_ingest')
+    def ingest(self, file, progress=None):
+        """Read, type and enrich a CSV. progress(rows_done, fraction) is called after every chunk"""
+        total_bytes = self._size(file)
+
+        file.seek(0)
+        columns = self.resolve_columns(pd.read_csv(file, nrows=0).columns)
+        dtypes = {col: dtype for col, dtype in self.dtypes.items() if col in columns}
+        file.seek(0)
+
+        chunks = []
+        rows_done = 0
+        reader = self._read_chunks(file, columns, dtypes)
+        try:
+            while True:
+                with stage('csv_parse'): #parsing only, metrics are timed separately
+                    chunk = next(reader, None)
+                if chunk is None:
+                    break
+                chunks.append(self.data_processor.calculate_row_metrics(chunk))
+                rows_done += len(chunk)
+                if progress:
+                    fraction = min(file.tell() / total_bytes, 1.0) if total_bytes else None
+                    progress(rows_done, fraction)
+        finally:
+            reader.close() #a failed chunk still closes the underlying CSV reader
+
+        if chunks:
+            df = pd.concat(chunks, ignore_index=True)
+        else:
+            df = self.data_processor.calculate_row_metrics(pd.DataFrame(columns=columns).astype(dtypes))
+        chunks.clear()
+
+        # Anomaly detection needs the whole table, so it runs once at the end
+        return self.data_processor.detect_anomalies(df)
+
+    def read(self, file):
+        """Header-resolved, typed rows without any metrics (e.g. a delta for DataProcessor.upsert)"""
+        file.seek(0)
+        columns = self.resolve_columns(pd.read_csv(file, nrows=0).columns)
+        file.seek(0)
+        df = pd.read_csv(file, header=0, names=columns)
+        for col, dtype in self.dtypes.items():
+            if col in df.columns: #blank or malformed cells become NaN instead of failing the read
+                df[col] = pd.to_numeric(df[col], errors='coerce').astype(dtype)
+        return df
+
+    def _read_chunks(self, file, columns, dtypes):
+        if self.engine == 'pyarrow':
+            import pyarrow as pa #optional faster parser
+            import pyarrow.csv as pa_csv
+
+            reader = pa_csv.open_csv(
+                file,
+                read_options=pa_csv.ReadOptions(
+                    column_names=columns,
+                    skip_rows=1,
+                    block_size=self.block_size
+                ),
+                convert_options=pa_csv.ConvertOptions(
+                    column_types={col: pa.type_for_alias(dtype) for col, dtype in dtypes.items()}
+                )
+            )
+            try:
+                for batch in reader:
+                    yield batch.to_pandas()
+            finally:
+                reader.close()
+        else:
+            with pd.read_csv(
+                file,
+                header=0,
+                names=columns,
+                dtype=dtypes,
+                chunksize=self.chunksize
+            ) as reader:
+                yield from reader
+
+    @staticmethod
+    def _size(file):
+        size = getattr(file, 'size', None) #Streamlit UploadedFile knows its size
+        if size is None:
+            try:
+                size = os.fstat(file.fileno()).st_size
+            except (AttributeError, OSError, io.UnsupportedOperation):
+                file.seek(0, io.SEEK_END)
+                size = file.tell()
+        return size
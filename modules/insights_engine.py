@@ -1,93 +1,256 @@
-import streamlit as st
-from prophet import Prophet
 import pandas as pd
+import numpy as np
+from config import Config
+from modules.forecast_cache import ForecastCache
+from modules.instrumentation import timed
+from modules.multi_forecast import MultiSeriesForecaster, build_series
+
+# Shared by every InsightsEngine so reruns and sessions reuse fitted forecasts
+forecast_cache = ForecastCache(Config.FORECAST_CACHE_SIZE, Config.FORECAST_CACHE_DIR)
 
 class InsightsEngine:
+    # Threshold rules, evaluated as masks over whole columns (listed in action order)
+    RULES = [
+        {'rule_id': 'inventory', 'severity': 'high', 'column': 'inventory_days', 'op': 'gt', 'threshold': 45},
+        {'rule_id': 'margin', 'severity': 'critical', 'column': 'margin_per_unit', 'op': 'lt', 'threshold': 1},
+        {'rule_id': 'payments', 'severity': 'medium', 'column': 'payment_gap', 'op': 'gt', 'threshold': 20}
+    ]
+
+    # Text is only filled in for the rows that are actually displayed
+    ACTION_TEMPLATES = {
+        'inventory': {
+            'action': "Reduce inventory days from {value} to under 45",
+            'steps': [
+                "Implement just-in-time ordering",
+                "Run promotional campaigns",
+                "Optimize reorder points"
+            ]
+        },
+        'margin': {
+            'action': "Increase margin from ${value:.2f} to >$1.00",
+            'steps': [
+                "Negotiate with suppliers",
+                "Bundle with higher-margin items",
+                "Implement value-added features"
+            ]
+        },
+        'payments': {
+            'action': "Reduce payment gap from {value} days to <20",
+            'steps': [
+                "Offer early payment discounts",
+                "Extend supplier terms",
+                "Consider invoice factoring"
+            ]
+        }
+    }
+
     def __init__(self, df):
         self.df = df
-    
-    def generate_insights(self):
-        insights = []
-        for _, row in self.df.iterrows():
-            insight = {
-                'sku': row['sku'],
-                'category': row['category'],
-                'priority': self._get_priority_level(row['priority_score']),
-                'actions': self._generate_actions(row)
+        self._rule_values = {}
+        self._whole_columns = {}
+        self._hits = None
+        self._priorities = None
+        self.forecast_error = None
+
+    @timed('generate_insights')
+    def generate_insights(self, rows=None):
+        """Build insight dicts for the given row positions (all rows by default)"""
+        positions = np.arange(len(self.df)) if rows is None else np.asarray(rows, dtype=int)
+        priorities = self.priority_levels()[positions]
+
+        hits = self.evaluate_rules()
+        hits = hits[hits['row'].isin(positions)]
+        actions = {}
+        for row, rule_id in zip(hits['row'], hits['rule_id']): #only loops over rows that broke a rule
+            actions.setdefault(row, []).append(self._build_action(rule_id, row))
+
+        skus = self.df['sku'].to_numpy()
+        categories = self.df['category'].to_numpy()
+        return [
+            {
+                'sku': skus[pos],
+                'category': categories[pos],
+                'priority': priorities[i],
+                'actions': actions.get(pos, [])
             }
-            insights.append(insight)
-        return insights
-    
-    def _get_priority_level(self, score):
-        if score > 0.7:
-            return 'High'
-        elif score > 0.4:
-            return 'Medium'
-        return 'Low'
-    
-    def _generate_actions(self, row):
-        actions = []
-        
-        # Inventory actions
-        if row['inventory_days'] > 45:
-            actions.append({
-                'type': 'inventory',
-                'severity': 'high',
-                'action': f"Reduce inventory days from {row['inventory_days']} to under 45",
-                'steps': [
-                    "Implement just-in-time ordering",
-                    "Run promotional campaigns",
-                    "Optimize reorder points"
-                ]
-            })
-        
-        # Margin actions
-        if row['margin_per_unit'] < 1:
-            actions.append({
-                'type': 'margin',
-                'severity': 'critical',
-                'action': f"Increase margin from ${row['margin_per_unit']:.2f} to >$1.00",
-                'steps': [
-                    "Negotiate with suppliers",
-                    "Bundle with higher-margin items",
-                    "Implement value-added features"
-                ]
-            })
-        
-        # Payment gap actions
-        payment_gap = row['customer_payment_days'] - row['supplier_payment_days']
-        if payment_gap > 20:
-            actions.append({
-                'type': 'payments',
-                'severity': 'medium',
-                'action': f"Reduce payment gap from {payment_gap} days to <20",
-                'steps': [
-                    "Offer early payment discounts",
-                    "Extend supplier terms",
-                    "Consider invoice factoring"
-                ]
-            })
-        
-        return actions
+            for i, pos in enumerate(positions)
+        ]
+
+    def select_rows(self, priorities=None, action_types=None, severities=None, categories=None, sort='desc'):
+        """Row positions matching every given filter, ordered by priority_score ('desc', 'asc' or None)"""
+        mask = np.ones(len(self.df), dtype=bool)
+        if priorities:
+            mask &= np.isin(self.priority_levels(), list(priorities))
+        if categories:
+            mask &= self.df['category'].isin(list(categories)).to_numpy()
+        if action_types or severities:
+            hits = self.evaluate_rules()
+            hit_mask = np.ones(len(hits), dtype=bool)
+            if action_types:
+                hit_mask &= hits['rule_id'].isin(list(action_types)).to_numpy()
+            if severities:
+                hit_mask &= hits['severity'].isin(list(severities)).to_numpy()
+            has_hit = np.zeros(len(self.df), dtype=bool)
+            has_hit[hits['row'].to_numpy()[hit_mask]] = True
+            mask &= has_hit
+
+        positions = np.flatnonzero(mask)
+        if sort:
+            scores = self.df['priority_score'].to_numpy(dtype=float)[positions]
+            order = np.argsort(-scores if sort == 'desc' else scores, kind='stable') #NaN scores sort last
+            positions = positions[order]
+        return positions
+
+    def update(self, df, rows):
+        """Switch to df (e.g. after DataProcessor.upsert) and re-evaluate only the rows at `rows`
+
+        Every other row must be unchanged and keep its position; rows past the old length are new
+        """
+        rows = np.asarray(rows, dtype=int)
+        old_len = len(self.df)
+        self.df = df
+        self._rule_values = {}
+        self._whole_columns = {}
+        self.forecast_error = None
+
+        if self._priorities is not None:
+            priorities = np.empty(len(df), dtype=object)
+            priorities[:old_len] = self._priorities[:len(df)]
+            priorities[rows] = self._priority_buckets(df['priority_score'].to_numpy(dtype=float)[rows])
+            self._priorities = priorities
+        if self._hits is not None:
+            kept = self._hits[~self._hits['row'].isin(rows)]
+            kept = kept.assign(order=kept['rule_id'].map({r['rule_id']: i for i, r in enumerate(self.RULES)}))
+            self._hits = self._sort_hits(self._concat_hits([kept, self._rule_hits(np.sort(rows))]))
+
+    def priority_levels(self):
+        """Bucket every priority_score into High/Medium/Low in one pass"""
+        if self._priorities is None:
+            self._priorities = self._priority_buckets(self.df['priority_score'].to_numpy(dtype=float))
+        return self._priorities
+
+    @staticmethod
+    def _priority_buckets(scores):
+        return np.array(
+            np.select([scores > 0.7, scores > 0.4], ['High', 'Medium'], default='Low'),
+            dtype=object
+        )
+
+    @timed('insight_rules')
+    def evaluate_rules(self):
+        """One row per (sku, rule) hit: row, sku, rule_id, severity, value"""
+        if self._hits is None:
+            self._hits = self._sort_hits(self._rule_hits())
+        return self._hits
+
+    def _rule_hits(self, positions=None):
+        """Unsorted hits (with each rule's order) for the rows at positions (all rows by default)"""
+        frames = []
+        for order, rule in enumerate(self.RULES):
+            values = self._get_rule_values(rule['column'])
+            if positions is not None:
+                values = values.iloc[positions]
+            mask = getattr(values, rule['op'])(rule['threshold']).to_numpy(dtype=bool) #NaN never fires
+            rows = np.flatnonzero(mask) if positions is None else positions[mask]
+            frames.append(pd.DataFrame({
+                'row': rows,
+                'sku': self.df['sku'].iloc[rows].to_numpy(),
+                'rule_id': rule['rule_id'],
+                'severity': rule['severity'],
+                'value': values.to_numpy()[mask],
+                'order': order
+            }))
+        return self._concat_hits(frames)
+
+    @staticmethod
+    def _concat_hits(frames):
+        # Rules without hits give empty frames, which pandas warns about concatenating
+        non_empty = [frame for frame in frames if len(frame)]
+        if not non_empty:
+            return frames[0] #no hits at all, an empty frame with the right columns
+        return pd.concat(non_empty, ignore_index=True)
+
+    @staticmethod
+    def _sort_hits(hits):
+        return (
+            hits.sort_values(['row', 'order'], kind='stable')
+            .drop(columns='order')
+            .reset_index(drop=True)
+        )
+
+    def _get_rule_values(self, column):
+        if column not in self._rule_values:
+            if column == 'payment_gap':
+                values = self.df['customer_payment_days'] - self.df['supplier_payment_days']
+            else:
+                values = self.df[column]
+            self._rule_values[column] = values
+        return self._rule_values[column]
+
+    def _is_whole_column(self, column):
+        # An integer CSV column (no blanks, whole numbers) would have been parsed as int64
+        if column not in self._whole_columns:
+            values = self._get_rule_values(column)
+            self._whole_columns[column] = bool(
+                pd.api.types.is_float_dtype(values)
+                and values.notna().all()
+                and (values == np.floor(values)).all()
+            )
+        return self._whole_columns[column]
+
+    def _build_action(self, rule_id, row):
+        rule = next(r for r in self.RULES if r['rule_id'] == rule_id)
+        template = self.ACTION_TEMPLATES[rule_id]
+        value = self._get_rule_values(rule['column']).to_numpy()[row]
+        if self._is_whole_column(rule['column']):
+            value = int(value) #whole day counts are stored as floats but read as "59", not "59.0"
+        return {
+            'type': rule_id,
+            'severity': rule['severity'],
+            'action': template['action'].format(value=value),
+            'steps': list(template['steps'])
+        }
     
-    def generate_cash_flow_forecast(self):
+    @timed('cash_flow_forecast')
+    def generate_cash_flow_forecast(self, periods=6, freq='ME'):
         try:
             # Prepare data for Prophet
             df_prophet = pd.DataFrame({
-                'ds': pd.date_range(start='2023-01-01', periods=12, freq='M'),
+                'ds': pd.date_range(start='2023-01-01', periods=12, freq=freq),
                 'y': np.linspace(
                     self.df['revenue'].sum() / 12,
                     self.df['revenue'].sum() / 12 * 1.2,
                     12
                 )
             })
-            
+
+            # Same series + same settings -> reuse the earlier fit instead of rerunning Stan
+            settings = {'model': 'prophet', 'periods': periods, 'freq': freq}
+            key = forecast_cache.fingerprint(df_prophet, settings)
+            cached = forecast_cache.get(key)
+            if cached is not None:
+                return cached['forecast'].copy()
+
+            from prophet import Prophet #pulls in cmdstanpy, so only on the first real fit
             model = Prophet()
             model.fit(df_prophet)
-            future = model.make_future_dataframe(periods=6, freq='M')
-            forecast = model.predict(future)
-            
-            return forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+            future = model.make_future_dataframe(periods=periods, freq=freq)
+            forecast = model.predict(future)[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+
+            forecast_cache.put(key, model.params, forecast)
+            return forecast.copy()
         except Exception as e:
-            st.error(f"Forecast failed: {str(e)}")
-            return None
\ No newline at end of file
+            self.forecast_error = str(e) #shown by the caller (UI or batch summary)
+            return None
+
+    @timed('segment_forecasts')
+    def generate_segment_forecasts(self, top_skus=10, periods=6, freq='ME'):
+        """Per-category and top-SKU forecasts as one long frame (Prophet in parallel, smoothing fallback)"""
+        forecaster = MultiSeriesForecaster(
+            horizon=periods,
+            freq=freq,
+            min_points=Config.SEGMENT_FORECAST_MIN_POINTS,
+            time_budget=Config.SEGMENT_FORECAST_TIME_BUDGET,
+            workers=Config.SEGMENT_FORECAST_WORKERS
+        )
+        return forecaster.forecast(build_series(self.df, top_skus=top_skus, freq=freq))
@@ -0,0 +1,147 @@
+"""Per-stage duration / row count / memory delta recording
+
+Off unless INSTRUMENTATION=1. When off, `timed` hands back the undecorated function and
+`stage` returns a shared no-op context manager, so nothing is measured or stored.
+"""
+import functools
+import json
+import os
+import resource
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+import pandas as pd
+from config import Config
+
+ENABLED = Config.INSTRUMENTATION
+_NOOP = nullcontext()
+_lock = threading.Lock()
+_recent = deque(maxlen=500) #newest records, for the debug sidebar
+_totals = {} #stage -> aggregates for the Prometheus file
+
+def _rss_bytes():
+    try:
+        with open('/proc/self/statm') as f: #current resident set size (Linux)
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 #peak RSS elsewhere
+
+def _row_count(*candidates):
+    for value in candidates:
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            return len(value)
+        if isinstance(getattr(value, 'df', None), pd.DataFrame): #e.g. InsightsEngine(self.df)
+            return len(value.df)
+    return None
+
+class _Stage:
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self.rss = _rss_bytes()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record(
+            self.name,
+            time.perf_counter() - self.started,
+            rows=self.rows,
+            memory_delta=_rss_bytes() - self.rss,
+            ok=exc_type is None
+        )
+        return False
+
+def stage(name, rows=None):
+    """`with stage('csv_parse', rows=n):` - no-op when instrumentation is off"""
+    if not ENABLED:
+        return _NOOP
+    return _Stage(name, rows)
+
+def timed(name):
+    """Decorator version of `stage`; rows come from the first DataFrame argument (or self.df) or the result"""
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            rss = _rss_bytes()
+            started = time.perf_counter()
+            ok = False
+            result = None
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                record(
+                    name,
+                    time.perf_counter() - started,
+                    rows=_row_count(*args, *kwargs.values(), result),
+                    memory_delta=_rss_bytes() - rss,
+                    ok=ok
+                )
+        return wrapper
+    return decorate
+
+def record(name, seconds, rows=None, memory_delta=None, ok=True):
+    entry = {
+        'timestamp': time.time(),
+        'stage': name,
+        'seconds': round(seconds, 6),
+        'rows': rows,
+        'memory_delta_bytes': memory_delta,
+        'ok': ok,
+        'pid': os.getpid()
+    }
+    with _lock:
+        _recent.append(entry)
+        totals = _totals.setdefault(name, {'count': 0, 'errors': 0, 'seconds': 0.0, 'rows': 0})
+        totals['count'] += 1
+        totals['errors'] += not ok
+        totals['seconds'] += seconds
+        totals['rows'] += rows or 0
+        totals['last_seconds'] = seconds
+        totals['last_memory_delta_bytes'] = memory_delta or 0
+        _write_log(entry)
+        _write_prometheus()
+
+def recent():
+    """Newest-last list of recorded stages (for the UI)"""
+    with _lock:
+        return list(_recent)
+
+def _write_log(entry):
+    path = Config.INSTRUMENTATION_LOG
+    if path:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+
+def _write_prometheus():
+    path = Config.INSTRUMENTATION_PROM
+    if not path:
+        return
+    metrics = [
+        ('stage_duration_seconds_sum', 'counter', 'seconds'),
+        ('stage_runs_total', 'counter', 'count'),
+        ('stage_errors_total', 'counter', 'errors'),
+        ('stage_rows_total', 'counter', 'rows'),
+        ('stage_last_duration_seconds', 'gauge', 'last_seconds'),
+        ('stage_last_memory_delta_bytes', 'gauge', 'last_memory_delta_bytes')
+    ]
+    lines = []
+    for metric, kind, key in metrics:
+        lines.append(f"# TYPE productvelocity_{metric} {kind}")
+        for name, totals in sorted(_totals.items()):
+            lines.append(f'productvelocity_{metric}{{stage="{name}"}} {totals[key]}')
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.replace(tmp_path, path) #scrapers never see a half-written file
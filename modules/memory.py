@@ -0,0 +1,76 @@
+"""Compact per-session datasets and per-session memory reporting"""
+import numpy as np
+import pandas as pd
+
+LABEL_COLUMNS = ['sku', 'category']
+# Money columns keep float64 so revenue/profit totals and $ figures stay exact to the cent
+EXACT_COLUMNS = ['unit_cost', 'unit_price', 'margin_per_unit', 'revenue', 'profit']
+# Derived ratios that are only ever shown to 1-2 decimals. priority_score stays float64
+# because float32 rounding could move a score across the 0.4 / 0.7 priority cut-offs
+REDUCED_PRECISION_COLUMNS = ['cash_cycle_days', 'loops_per_year', 'revenue_efficiency']
+# Day/unit counts get added together, so never go below int32 (int8/int16 sums would overflow)
+MIN_INT_DTYPE = np.int32
+
+def compact_frame(df):
+    """Downcast numbers, make labels categorical and store derived ratios as float32 (in place)"""
+    for col in df.columns:
+        values = df[col]
+        if col in LABEL_COLUMNS:
+            if pd.api.types.is_string_dtype(values) and not isinstance(values.dtype, pd.CategoricalDtype):
+                df[col] = _compact_labels(values)
+        elif col in EXACT_COLUMNS or col == 'anomaly':
+            continue
+        elif col in REDUCED_PRECISION_COLUMNS and values.dtype.kind == 'f':
+            df[col] = values.astype(np.float32)
+        elif values.dtype.kind in 'iu' and values.dtype.itemsize > np.dtype(MIN_INT_DTYPE).itemsize:
+            if values.min() >= np.iinfo(MIN_INT_DTYPE).min and values.max() <= np.iinfo(MIN_INT_DTYPE).max:
+                df[col] = values.astype(MIN_INT_DTYPE)
+        elif values.dtype.kind == 'f':
+            df[col] = _downcast_float(values)
+    return df
+
+def _compact_labels(values):
+    if values.nunique(dropna=True) <= len(values) // 2:
+        return values.astype('category') #repeated strings stored once
+    if values.dtype != object:
+        return values #already a string dtype (pandas 3 default), one contiguous buffer
+    try:
+        return values.astype('string[pyarrow]') #mostly unique (e.g. sku): one contiguous buffer
+    except ImportError:
+        return values
+
+def _downcast_float(values):
+    # Whole-number float columns (days, units with blanks) fit float32 exactly up to 2**24
+    finite = values.to_numpy()[np.isfinite(values.to_numpy())]
+    if len(finite) and (np.abs(finite).max() > 2**24 or (finite != np.round(finite)).any()):
+        return values
+    return values.astype(np.float32)
+
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+def object_bytes(obj, _seen=None):
+    """Approximate memory held by an object graph (DataFrames, arrays, dicts, engines)"""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return int(obj.memory_usage(deep=True, index=True).sum()) if isinstance(obj, pd.DataFrame) \
+            else int(obj.memory_usage(deep=True, index=True))
+    if isinstance(obj, np.ndarray):
+        return 0 if obj.base is not None else obj.nbytes #views share memory that is counted elsewhere
+    if isinstance(obj, dict):
+        return sum(object_bytes(value, seen) for value in obj.values())
+    if isinstance(obj, (list, tuple, set)):
+        return sum(object_bytes(value, seen) for value in obj)
+    if hasattr(obj, '__dict__'):
+        return object_bytes(vars(obj), seen)
+    return 0
+
+def session_memory(state):
+    """Bytes held per session_state key, largest first"""
+    seen = set()
+    usage = {key: object_bytes(state[key], seen) for key in list(state.keys())}
+    return dict(sorted(usage.items(), key=lambda item: item[1], reverse=True))
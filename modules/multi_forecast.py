@@ -0,0 +1,203 @@
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+import pandas as pd
+
+FORECAST_COLUMNS = ['series_id', 'level', 'ds', 'yhat', 'yhat_lower', 'yhat_upper', 'model']
+Z_80 = 1.2816 #Prophet's default interval_width is 0.8
+
+def build_series(df, top_skus=10, periods=12, freq='ME'):
+    """Long (series_id, level, ds, y) history per category and for the top SKUs by revenue
+
+    Uses the same 12-period ramp the portfolio forecast builds from total revenue,
+    applied to each category's / SKU's own revenue.
+    """
+    groups = [('category', df.groupby('category', observed=True)['revenue'].sum())]
+    if top_skus:
+        sku_revenue = df.groupby('sku', observed=True, sort=False)['revenue'].sum() #a SKU listed twice is one series
+        groups.append(('sku', sku_revenue.nlargest(top_skus)))
+
+    ds = pd.date_range(start='2023-01-01', periods=periods, freq=freq)
+    ramp = np.linspace(1.0, 1.2, periods)
+    frames = []
+    for level, revenue in groups:
+        values = revenue.to_numpy(dtype=float)[:, None] / periods * ramp[None, :]
+        frames.append(pd.DataFrame({
+            'series_id': np.repeat([f"{level}:{key}" for key in revenue.index], periods),
+            'level': level,
+            'ds': np.tile(ds, len(revenue)),
+            'y': values.ravel()
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+def exp_smoothing_forecast(history, horizon=6, freq='ME', alpha=0.5, beta=0.3):
+    """Holt's linear smoothing for every series at once (series x time arrays, one pass over time)"""
+    history = history.dropna(subset=['y']).sort_values(['series_id', 'ds'])
+    y = history.pivot(index='series_id', columns='ds', values='y')
+    series_ids = y.index.to_numpy()
+    Y = y.to_numpy(dtype=float)
+    n_series, n_steps = Y.shape
+
+    level = np.full(n_series, np.nan)
+    trend = np.zeros(n_series)
+    fitted = np.full_like(Y, np.nan)
+    for t in range(n_steps):
+        obs = Y[:, t]
+        has_obs = ~np.isnan(obs)
+        started = ~np.isnan(level)
+
+        fitted[:, t] = level + trend #one-step-ahead prediction (NaN before the first observation)
+        new_level = np.where(has_obs, alpha * obs + (1 - alpha) * (level + trend), level + trend)
+        new_level = np.where(has_obs & ~started, obs, new_level) #first observation seeds the level
+        trend = np.where(has_obs & started, beta * (new_level - level) + (1 - beta) * trend, trend)
+        level = new_level
+
+    residuals = Y - fitted
+    with np.errstate(invalid='ignore'):
+        sigma = np.nan_to_num(np.nanstd(residuals, axis=1)) if n_steps > 1 else np.zeros(n_series)
+    steps = np.arange(1, horizon + 1)
+    future = level[:, None] + trend[:, None] * steps[None, :]
+    spread = Z_80 * sigma[:, None] * np.sqrt(steps)[None, :]
+
+    # In-sample fit followed by the horizon, same shape as a Prophet predict over make_future_dataframe
+    last_ds = history.groupby('series_id')['ds'].max().reindex(series_ids)
+    future_ds = {
+        last: pd.date_range(last, periods=horizon + 1, freq=freq)[1:] for last in last_ds.unique()
+    }
+    fitted = np.where(np.isnan(fitted), Y, fitted) #first observation has no prior, show it as-is
+    in_sample = history.assign(yhat=fitted[~np.isnan(Y)])
+    in_sample_spread = Z_80 * sigma[pd.Index(series_ids).get_indexer(in_sample['series_id'])]
+    frames = [
+        pd.DataFrame({
+            'series_id': in_sample['series_id'].to_numpy(),
+            'ds': in_sample['ds'].to_numpy(),
+            'yhat': in_sample['yhat'].to_numpy(),
+            'yhat_lower': in_sample['yhat'].to_numpy() - in_sample_spread,
+            'yhat_upper': in_sample['yhat'].to_numpy() + in_sample_spread
+        }),
+        pd.DataFrame({
+            'series_id': np.repeat(series_ids, horizon),
+            'ds': np.concatenate([future_ds[last] for last in last_ds]) if n_series else [],
+            'yhat': future.ravel(),
+            'yhat_lower': (future - spread).ravel(),
+            'yhat_upper': (future + spread).ravel()
+        })
+    ]
+    result = pd.concat(frames, ignore_index=True)
+    result['model'] = 'exp_smoothing'
+    return result
+
+class _TimeBudgetExceeded(Exception):
+    pass
+
+def _raise_budget(signum, frame):
+    raise _TimeBudgetExceeded()
+
+def _fit_prophet(series_id, frame, horizon, freq, time_budget):
+    """Worker: fit one series with Prophet inside a wall-clock budget. None means use the fallback"""
+    use_alarm = time_budget and hasattr(signal, 'SIGALRM')
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_budget)
+        signal.setitimer(signal.ITIMER_REAL, time_budget)
+    try:
+        from prophet import Prophet
+        model = Prophet()
+        model.fit(frame[['ds', 'y']])
+        future = model.make_future_dataframe(periods=horizon, freq=freq)
+        forecast = model.predict(future)[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+        forecast.insert(0, 'series_id', series_id)
+        forecast['model'] = 'prophet'
+        return forecast
+    except Exception:
+        return None #over budget or failed to fit
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _import_prophet():
+    """Pool initializer: each worker imports Prophet once when it starts, not once per series"""
+    try:
+        import prophet  # noqa: F401
+    except ImportError:
+        pass #workers will fall back to smoothing
+
+def worker_pool(workers=None):
+    """Process pool shared by every forecast in this process (started lazily, or by the warm-up)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_import_prophet)
+        return _pool
+
+def discard_worker_pool(pool):
+    """Drop a broken pool so the next worker_pool() call starts a new one"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+class MultiSeriesForecaster:
+    """Forecasts many series: Prophet in worker processes, vectorized smoothing for short/sparse ones"""
+
+    def __init__(self, horizon=6, freq='ME', min_points=10, time_budget=30.0, workers=None):
+        self.horizon = horizon
+        self.freq = freq
+        self.min_points = min_points #fewer observations than this skip Prophet
+        self.time_budget = time_budget #seconds per series before falling back
+        self.workers = workers
+
+    def forecast(self, history):
+        """history: long (series_id, [level,] ds, y) frame. Returns one long frame for all series"""
+        history = history.dropna(subset=['y'])
+        levels = history.drop_duplicates('series_id').set_index('series_id')['level'] \
+            if 'level' in history.columns else None
+
+        # The fallback is cheap, so compute it for every series up front
+        fallback = exp_smoothing_forecast(history, self.horizon, self.freq)
+
+        counts = history.groupby('series_id').size()
+        long_enough = counts.index[counts >= self.min_points]
+        results = []
+        if len(long_enough):
+            grouped = dict(tuple(history[history['series_id'].isin(long_enough)].groupby('series_id')))
+            results = self._fit_all(grouped)
+
+        fitted = [r for r in results if r is not None]
+        fitted_ids = {r['series_id'].iat[0] for r in fitted}
+        fallback = fallback[~fallback['series_id'].isin(fitted_ids)]
+
+        result = pd.concat(fitted + [fallback], ignore_index=True)
+        result['level'] = result['series_id'].map(levels) if levels is not None else None
+        return result[FORECAST_COLUMNS].sort_values(['series_id', 'ds'], ignore_index=True)
+
+    def _fit_all(self, grouped):
+        """Prophet result (or None) per series, in grouped order"""
+        pool = worker_pool(self.workers)
+        try:
+            futures = self._submit(pool, grouped)
+        except BrokenProcessPool: #a worker died since the last run and took the pool with it
+            discard_worker_pool(pool)
+            pool = worker_pool(self.workers)
+            futures = self._submit(pool, grouped)
+
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except BrokenProcessPool: #crashed mid-fit, this series and the rest fall back to smoothing
+                discard_worker_pool(pool)
+                results.append(None)
+        return results
+
+    def _submit(self, pool, grouped):
+        return [
+            pool.submit(_fit_prophet, series_id, frame, self.horizon, self.freq, self.time_budget)
+            for series_id, frame in grouped.items()
+        ]
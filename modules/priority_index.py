@@ -0,0 +1,127 @@
+"""Top-K priority queries over a scored catalog, backed by indexes built once per dataset
+
+    index = PriorityIndex(df)
+    index.top_k(10)                                          # best 10 overall
+    index.top_k(20, categories=['Coffee'], anomaly=True)     # flagged SKUs in one category
+    index.top_k(5, cash_cycle_days=(None, 30), margin_per_unit=(2, None))
+
+Indexes: every row's priority rank (one argsort), rows grouped by (category, anomaly flag)
+and ranked inside each group, and a lazily built sorted-value index per range column.
+Unfiltered queries are a slice, group filters merge the first k of each group, and range
+filters binary-search the sorted values before an argpartition over the matches.
+"""
+import numpy as np
+import pandas as pd
+from modules.instrumentation import timed
+
+class PriorityIndex:
+    RANGE_COLUMNS = ['cash_cycle_days', 'margin_per_unit']
+
+    @timed('priority_index')
+    def __init__(self, df):
+        self.df = df
+        scores = df['priority_score'].to_numpy(dtype=float)
+        self._order = np.argsort(-scores, kind='stable') #best first, NaN scores last
+        self._rank = np.empty(len(df), dtype=np.int64)
+        self._rank[self._order] = np.arange(len(df))
+
+        # Group key = category code * 2 + anomaly flag, rows ranked by priority inside each group
+        codes, self.categories = pd.factorize(df['category'])
+        anomalies = df['anomaly'].to_numpy() == -1 if 'anomaly' in df.columns else np.zeros(len(df), dtype=bool)
+        self._keys = codes.astype(np.int64) * 2 + anomalies
+        self._grouped = np.lexsort((self._rank, self._keys))
+        group_keys, starts = np.unique(self._keys[self._grouped], return_index=True)
+        ends = np.append(starts[1:], len(df))
+        self._groups = {key: (start, end) for key, start, end in zip(group_keys.tolist(), starts, ends)}
+
+        self._values = {}
+        self._sorted = {} #column -> (row positions by value, sorted values), NaN last
+
+    def top_k(self, k=10, **filters):
+        """Matching rows as a DataFrame, best priority first, with their overall priority_rank (1 = best)"""
+        positions = self.top_k_positions(k, **filters)
+        result = self.df.iloc[positions].copy()
+        result.insert(0, 'priority_rank', self._rank[positions] + 1)
+        return result
+
+    def top_k_positions(self, k=10, categories=None, anomaly=None, cash_cycle_days=None, margin_per_unit=None):
+        """Row positions of the k best-scored rows matching every filter (k=None: all of them)
+
+        categories: iterable of category values. anomaly: True (flagged only), False (unflagged only)
+        or None. Range filters are (low, high) tuples, inclusive, None for an open end
+        """
+        keys = self._allowed_keys(categories, anomaly)
+        ranges = {
+            col: bounds for col, bounds in zip(self.RANGE_COLUMNS, [cash_cycle_days, margin_per_unit])
+            if bounds is not None and bounds != (None, None)
+        }
+
+        if ranges:
+            # Start from the narrowest range (two binary searches each), check the rest on those rows
+            slices = {col: self._range(col, *bounds) for col, bounds in ranges.items()}
+            first = min(slices, key=lambda col: len(slices[col]))
+            candidates = slices[first]
+            for col, (low, high) in ranges.items():
+                if col != first:
+                    values = self._column(col)[candidates]
+                    candidates = candidates[self._within(values, low, high)]
+            if keys is not None:
+                candidates = candidates[np.isin(self._keys[candidates], keys)]
+        elif keys is None:
+            return self._order[:k].copy() if k is not None else self._order.copy()
+        else:
+            # Each group is already in priority order, so only its first k rows can make the cut
+            candidates = np.concatenate([
+                self._grouped[start:end if k is None else min(end, start + k)]
+                for start, end in (self._groups[key] for key in keys.tolist() if key in self._groups)
+            ] or [np.empty(0, dtype=np.int64)])
+        return self._best(candidates, k)
+
+    def value_range(self, column):
+        """(min, max) of a range column ignoring blanks, e.g. for slider bounds"""
+        positions, values = self._sorted_index(column)
+        finite = values[np.isfinite(values)]
+        return (float(finite[0]), float(finite[-1])) if len(finite) else (0.0, 0.0)
+
+    def _allowed_keys(self, categories, anomaly):
+        if categories is None and anomaly is None:
+            return None
+        codes = np.arange(len(self.categories)) if categories is None else \
+            self.categories.get_indexer(list(categories))
+        codes = codes[codes >= 0].astype(np.int64) #unknown categories match nothing
+        if categories is None:
+            codes = np.append(codes, -1) #rows without a category
+        flags = [0, 1] if anomaly is None else [int(bool(anomaly))]
+        return np.concatenate([codes * 2 + flag for flag in flags])
+
+    def _best(self, candidates, k):
+        if k is not None and len(candidates) > k:
+            candidates = candidates[np.argpartition(self._rank[candidates], k - 1)[:k]] #O(n), no full sort
+        return candidates[np.argsort(self._rank[candidates])]
+
+    def _column(self, column):
+        if column not in self._values:
+            self._values[column] = self.df[column].to_numpy(dtype=float)
+        return self._values[column]
+
+    def _sorted_index(self, column):
+        if column not in self._sorted:
+            values = self._column(column)
+            positions = np.argsort(values, kind='stable')
+            self._sorted[column] = (positions, values[positions])
+        return self._sorted[column]
+
+    def _range(self, column, low, high):
+        positions, values = self._sorted_index(column)
+        start = 0 if low is None else np.searchsorted(values, low, side='left')
+        end = np.searchsorted(values, np.inf if high is None else high, side='right') #NaN sits past inf
+        return positions[start:end]
+
+    @staticmethod
+    def _within(values, low, high):
+        mask = ~np.isnan(values)
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+        return mask
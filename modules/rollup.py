@@ -0,0 +1,123 @@
+"""Category / SKU rollup, built once per dataset and read by the KPI tiles and the sunburst"""
+import numpy as np
+import pandas as pd
+from modules.instrumentation import timed
+
+UNCATEGORIZED = 'Uncategorized'
+
+class CategoryRollup:
+    """Per-category totals plus a two-level tree: top-N SKUs by revenue and one "Other" node
+
+    `categories` has one row per category (revenue, profit, sku count and revenue-weighted
+    cash cycle / loops). `nodes` is the sunburst tree (id, label, parent, ...) with at most
+    top_n + 1 children per category, whatever the catalog size. Sums and counts are kept so
+    the KPI tiles come out the same as aggregating the full frame.
+    """
+
+    def __init__(self, df, top_n=20):
+        self.rows = len(df)
+        self.top_n = top_n
+        self._build(df)
+
+    def __len__(self):
+        return self.rows #rows of the source data, e.g. for the large-data chart mode
+
+    @timed('category_rollup')
+    def _build(self, df):
+        frame = pd.DataFrame({
+            'category': df['category'],
+            'sku': df['sku'],
+            'revenue': df['revenue'].astype(float),
+            'profit': df['profit'].astype(float),
+            'cash_cycle_days': df['cash_cycle_days'].astype(float),
+            'loops_per_year': df['loops_per_year'].astype(float)
+        })
+        rank = frame.groupby('category', observed=True, dropna=False, sort=False)['revenue'] \
+            .rank(method='first', ascending=False) #NaN revenue ranks last
+        in_top = (rank <= self.top_n).to_numpy()
+
+        self.categories = self._aggregate(frame)
+        self.totals = self.categories[
+            ['revenue', 'profit', 'skus', 'cycle_sum', 'cycle_count', 'loops_sum', 'loops_count']
+        ].sum()
+
+        top = frame[in_top]
+        other = self._aggregate(frame[~in_top])
+        category_labels = self._labels(self.categories.index)
+        self.nodes = pd.concat([
+            pd.DataFrame({
+                'id': category_labels,
+                'label': category_labels,
+                'parent': '',
+                'revenue': self.categories['revenue'].to_numpy(),
+                'profit': self.categories['profit'].to_numpy(),
+                'cash_cycle_days': self.categories['cash_cycle_days'].to_numpy(),
+                'loops_per_year': self.categories['loops_per_year'].to_numpy(),
+                'skus': self.categories['skus'].to_numpy()
+            }),
+            pd.DataFrame({
+                'id': self._labels(top['category']) + '/' + top['sku'].astype(str).to_numpy(),
+                'label': top['sku'].astype(str).to_numpy(),
+                'parent': self._labels(top['category']),
+                'revenue': top['revenue'].to_numpy(),
+                'profit': top['profit'].to_numpy(),
+                'cash_cycle_days': top['cash_cycle_days'].to_numpy(),
+                'loops_per_year': top['loops_per_year'].to_numpy(),
+                'skus': 1
+            }),
+            pd.DataFrame({
+                'id': self._labels(other.index) + '/' + 'Other',
+                'label': 'Other (' + other['skus'].astype(str).to_numpy() + ' SKUs)',
+                'parent': self._labels(other.index),
+                'revenue': other['revenue'].to_numpy(),
+                'profit': other['profit'].to_numpy(),
+                'cash_cycle_days': other['cash_cycle_days'].to_numpy(),
+                'loops_per_year': other['loops_per_year'].to_numpy(),
+                'skus': other['skus'].to_numpy()
+            })
+        ], ignore_index=True)
+
+    def kpis(self):
+        """Total revenue / profit and per-SKU average cash cycle and loops (NaN-skipping, like pandas)"""
+        totals = self.totals
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return {
+                'revenue': totals['revenue'],
+                'profit': totals['profit'],
+                'skus': int(totals['skus']),
+                'avg_cash_cycle_days': totals['cycle_sum'] / totals['cycle_count'],
+                'avg_loops_per_year': totals['loops_sum'] / totals['loops_count']
+            }
+
+    @staticmethod
+    def _aggregate(frame):
+        # Revenue weights only count where the weighted value is known
+        cycle_known = frame['cash_cycle_days'].notna()
+        loops_known = frame['loops_per_year'].notna()
+        parts = frame.assign(
+            cycle_weight=frame['revenue'].where(cycle_known),
+            cycle_weighted=frame['revenue'] * frame['cash_cycle_days'],
+            loops_weight=frame['revenue'].where(loops_known),
+            loops_weighted=frame['revenue'] * frame['loops_per_year']
+        )
+        agg = parts.groupby('category', observed=True, dropna=False, sort=True).agg(
+            revenue=('revenue', 'sum'),
+            profit=('profit', 'sum'),
+            skus=('revenue', 'size'),
+            cycle_sum=('cash_cycle_days', 'sum'),
+            cycle_count=('cash_cycle_days', 'count'),
+            loops_sum=('loops_per_year', 'sum'),
+            loops_count=('loops_per_year', 'count'),
+            cycle_weight=('cycle_weight', 'sum'),
+            cycle_weighted=('cycle_weighted', 'sum'),
+            loops_weight=('loops_weight', 'sum'),
+            loops_weighted=('loops_weighted', 'sum')
+        )
+        with np.errstate(invalid='ignore', divide='ignore'): #zero-revenue categories get NaN
+            agg['cash_cycle_days'] = agg['cycle_weighted'] / agg['cycle_weight'].replace(0, np.nan)
+            agg['loops_per_year'] = agg['loops_weighted'] / agg['loops_weight'].replace(0, np.nan)
+        return agg.drop(columns=['cycle_weight', 'cycle_weighted', 'loops_weight', 'loops_weighted'])
+
+    @staticmethod
+    def _labels(values):
+        return pd.Series(values, dtype=object).fillna(UNCATEGORIZED).astype(str).to_numpy()
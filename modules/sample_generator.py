@@ -0,0 +1,130 @@
+import asyncio
+import hashlib
+import io
+import json
+import os
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from modules.caching import atomic_write
+
+DEFAULT_MODEL_URL = "https://api-inference.huggingface.co/models/mistralai/Mixtral-8x7B-Instruct-v0.1"
+
+class GenerationError(Exception):
+    """The model endpoint answered, but not with usable generated text"""
+
+    def __init__(self, message, status_code=None, text=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.text = text
+
+class SampleDataClient:
+    """Hugging Face text-generation client: pooled session, retries with backoff, on-disk cache"""
+
+    def __init__(self, api_key, endpoint_url=DEFAULT_MODEL_URL, timeout=(5, 60), retries=3,
+                 backoff=1.0, cache_dir=None, pool_size=8):
+        self.api_key = api_key
+        self.endpoint_url = endpoint_url #point at a local stub server for testing
+        self.timeout = timeout #(connect, read) seconds
+        self.cache_dir = cache_dir
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        # One pooled session: keep-alive connections, retry 429/5xx with exponential backoff
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=['POST'],
+            raise_on_status=False #hand back the last response so its status can be shown
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['Authorization'] = f"Bearer {api_key}"
+
+    @staticmethod
+    def build_prompt(business_idea, rows=5, batch=0, batches=1):
+        #Models output CSV, avoids getting unnessary text from the LLM, column asked are only what is expected
+        prompt = f"Generate {rows} sample product rows for a {business_idea} business with: sku, category, inventory_days, units_sold, unit_cost, unit_price, customer_payment_days, supplier_payment_days. Return only CSV."
+        if batches > 1: #otherwise every batch would be the same cached answer
+            prompt += f" This is set {batch + 1} of {batches}, use different SKUs than the other sets."
+        return prompt
+
+    def generate(self, prompt, use_cache=True):
+        """Generated text for a prompt, from the cache when the same prompt + model was seen before
+
+        Only answers that parse as CSV are cached, so a malformed answer is asked for again next
+        time. use_cache=False skips the cached answer and replaces it with the new one
+        """
+        if use_cache:
+            cached = self._read_cache(prompt)
+            if cached is not None:
+                return cached
+
+        response = self.session.post(self.endpoint_url, json={"inputs": prompt}, timeout=self.timeout)
+        if response.status_code != 200:
+            raise GenerationError(
+                f"Failed to generate data. Status code: {response.status_code}",
+                response.status_code,
+                response.text
+            )
+
+        result = response.json()
+        #Ensures data is in the format we want and Mixtral didnt give like a sentence
+        if not (isinstance(result, list) and result and 'generated_text' in result[0]):
+            raise GenerationError("AI model returned unexpected format.", response.status_code, response.text)
+
+        text = result[0]['generated_text']
+        try:
+            parsed = parse_generated_csv(text)
+        except Exception as e:
+            raise GenerationError(f"AI model returned text that is not valid CSV: {e}", response.status_code, text)
+        if parsed.empty:
+            raise GenerationError("AI model returned CSV without any rows.", response.status_code, text)
+
+        self._write_cache(prompt, text)
+        return text
+
+    async def generate_many(self, prompts, use_cache=True):
+        """Send several prompts concurrently (each on a worker thread sharing the pooled session)"""
+        return await asyncio.gather(*(asyncio.to_thread(self.generate, prompt, use_cache) for prompt in prompts))
+
+    def generate_sample(self, business_idea, batches=1, rows=5, use_cache=True):
+        """Raw texts for `batches` prompts of `rows` rows each, requested in parallel"""
+        prompts = [self.build_prompt(business_idea, rows, i, batches) for i in range(batches)]
+        return asyncio.run(self.generate_many(prompts, use_cache))
+
+    def _cache_path(self, prompt):
+        if not self.cache_dir:
+            return None
+        key = hashlib.sha256(json.dumps([self.endpoint_url, prompt]).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_cache(self, prompt):
+        path = self._cache_path(prompt)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                return json.load(f)['generated_text']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_cache(self, prompt, text):
+        path = self._cache_path(prompt)
+        if path:
+            def write(tmp_path):
+                with open(tmp_path, 'w') as f:
+                    json.dump({'prompt': prompt, 'generated_text': text}, f)
+            atomic_write(path, write) #batches of one request write concurrently
+
+def parse_generated_csv(text):
+    """Turn one model answer into a DataFrame"""
+    #Result trimming, add more if needed or if more efficient
+    text = text.strip()
+    if text.startswith("Generate"): #model echoed the prompt
+        text = text[text.find("\n")+1:]
+    return pd.read_csv(io.StringIO(text)) #Converts result to an in-memory file, reads with pandas
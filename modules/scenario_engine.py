@@ -0,0 +1,223 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from modules.data_processor import DataProcessor
+from modules.instrumentation import timed
+
+# Shift distributions for simulate(): (name, mean, spread) in days
+DISTRIBUTIONS = ['normal', 'uniform', 'triangular']
+
+class ScenarioEngine:
+    """What-if recomputation of the day-dependent metrics on top of a precomputed baseline"""
+
+    def __init__(self, df):
+        self.df = df
+
+        # Baseline inputs, coerced once and kept as plain arrays (the base frame is never copied)
+        self.inventory_days = pd.to_numeric(df['inventory_days'], errors='coerce').to_numpy()
+        self.customer_payment_days = pd.to_numeric(df['customer_payment_days'], errors='coerce').to_numpy()
+        self.supplier_payment_days = df['supplier_payment_days'].to_numpy()
+        self.revenue = df['revenue'].to_numpy()
+        self.margin_per_unit = df['margin_per_unit'].to_numpy()
+
+        self._sweeps = {}
+        self._simulations = {}
+
+        base_cycle = self.inventory_days + self.customer_payment_days - self.supplier_payment_days
+        self.baseline = {
+            'revenue': df['revenue'].sum(),
+            'loops_per_year': df['loops_per_year'].mean(),
+            'revenue_efficiency': np.nansum(guarded_efficiency(self.revenue, base_cycle)) #same guard as the scenarios
+        }
+
+    def apply(self, inv_reduction=0, payment_improvement=0):
+        """Dependent columns after the deltas, as arrays aligned with the base frame"""
+        cash_cycle_days = (
+            (self.inventory_days - inv_reduction) +
+            (self.customer_payment_days - payment_improvement) -
+            self.supplier_payment_days
+        )
+        loops_per_year = 365 / np.maximum(cash_cycle_days, 1)
+        with np.errstate(divide='ignore', invalid='ignore'): #zero-day cycles give inf, same as pandas
+            revenue_efficiency = self.revenue / cash_cycle_days
+
+        weights = DataProcessor.PRIORITY_WEIGHTS
+        priority_score = (
+            revenue_efficiency * weights['revenue_efficiency'] +
+            loops_per_year * weights['loops_per_year'] +
+            self.margin_per_unit * weights['margin_per_unit']
+        )
+        return {
+            'cash_cycle_days': cash_cycle_days,
+            'loops_per_year': loops_per_year,
+            'revenue_efficiency': revenue_efficiency,
+            'priority_score': priority_score
+        }
+
+    def summarize(self, inv_reduction=0, payment_improvement=0):
+        """Scenario totals and their deltas against the baseline
+
+        Total revenue efficiency leaves out SKUs whose cash cycle is zero or negative (see
+        guarded_efficiency), `excluded_skus` says how many that was
+        """
+        scenario = self.apply(inv_reduction, payment_improvement)
+        efficiency = guarded_efficiency(self.revenue, scenario['cash_cycle_days'])
+        summary = {
+            'revenue': self.baseline['revenue'], #revenue doesn't depend on days
+            'loops_per_year': _nanmean(scenario['loops_per_year']),
+            'revenue_efficiency': np.nansum(efficiency),
+            'excluded_skus': int((scenario['cash_cycle_days'] <= 0).sum())
+        }
+        with np.errstate(invalid='ignore'):
+            summary.update({f"delta_{key}": summary[key] - self.baseline[key] for key in self.baseline})
+        return summary
+
+    def sweep(self, inv_reductions=range(0, 31), payment_improvements=range(0, 31), block_size=50_000):
+        """Totals for every (inventory, payment) pair on the grid, computed in one broadcast per block"""
+        key = (tuple(inv_reductions), tuple(payment_improvements))
+        if key in self._sweeps:
+            return self._sweeps[key]
+
+        inv = np.asarray(key[0], dtype=float)
+        pay = np.asarray(key[1], dtype=float)
+        # Both deltas only ever shift the cash cycle, so the grid collapses onto a+b
+        grid_shift = inv[:, None] + pay[None, :]
+        shifts, grid_index = np.unique(grid_shift, return_inverse=True)
+
+        base_cycle = self.inventory_days + self.customer_payment_days - self.supplier_payment_days
+        efficiency_total = np.zeros(len(shifts))
+        loops_total = np.zeros(len(shifts))
+        loops_count = np.zeros(len(shifts))
+        excluded = np.zeros(len(shifts), dtype=np.int64)
+        for start in range(0, len(base_cycle), block_size): #bounds memory to shifts x block_size
+            cycle = base_cycle[None, start:start + block_size] - shifts[:, None]
+            loops = 365 / np.maximum(cycle, 1)
+            efficiency = guarded_efficiency(self.revenue[None, start:start + block_size], cycle)
+            efficiency_total += np.nansum(efficiency, axis=1)
+            loops_total += np.nansum(loops, axis=1)
+            loops_count += (~np.isnan(loops)).sum(axis=1)
+            excluded += (cycle <= 0).sum(axis=1)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            loops_mean = loops_total / loops_count #NaN when a column has no valid rows, like .mean()
+
+        grid_index = grid_index.reshape(grid_shift.shape)
+        result = {
+            'inv_reduction': inv,
+            'payment_improvement': pay,
+            'revenue_efficiency': efficiency_total[grid_index],
+            'loops_per_year': loops_mean[grid_index],
+            'excluded_skus': excluded[grid_index] #left out of revenue efficiency, per cell
+        }
+        self._sweeps[key] = result
+        return result
+
+    @timed('scenario_simulation')
+    def simulate(self, draws=2000, inventory=('normal', 5, 2), payment=('normal', 5, 2), seed=42,
+                 chunk_rows=50_000, workers=None, parallel_rows=200_000):
+        """Monte Carlo version of summarize(): P10/P50/P90 of the totals over `draws` random scenarios
+
+        Every draw gives each SKU its own inventory-day reduction and payment-day improvement,
+        sampled from `inventory` / `payment` = (distribution, mean, spread). Spread is the standard
+        deviation for 'normal' and the half-width for 'uniform' / 'triangular'. Revenue efficiency
+        uses the same cash-cycle guard as summarize(), so zero spread gives summarize()'s totals.
+        SKUs are split into fixed chunks with their own seeded streams, so results only depend on
+        seed and chunk_rows, not on how many processes ran them. Catalogs over parallel_rows use
+        worker processes.
+        """
+        key = (draws, tuple(inventory), tuple(payment), seed, chunk_rows)
+        if key in self._simulations:
+            return self._simulations[key]
+
+        base_cycle = self.inventory_days + self.customer_payment_days - self.supplier_payment_days
+        starts = range(0, len(base_cycle), chunk_rows)
+        chunk_args = [
+            (index, base_cycle[start:start + chunk_rows], self.revenue[start:start + chunk_rows],
+             draws, tuple(inventory), tuple(payment), seed)
+            for index, start in enumerate(starts)
+        ]
+        if len(base_cycle) > parallel_rows and len(chunk_args) > 1 and workers != 1:
+            with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+                parts = list(pool.map(_simulate_chunk, *zip(*chunk_args)))
+        else:
+            parts = [_simulate_chunk(*args) for args in chunk_args]
+
+        # Chunk results are per-draw sums, so they simply add up
+        efficiency_total = np.zeros(draws)
+        loops_total = np.zeros(draws)
+        loops_count = np.zeros(draws)
+        excluded = np.zeros(draws)
+        for efficiency, loops, count, skipped in parts:
+            efficiency_total += efficiency
+            loops_total += loops
+            loops_count += count
+            excluded += skipped
+        with np.errstate(divide='ignore', invalid='ignore'):
+            loops_mean = loops_total / loops_count
+
+        with np.errstate(invalid='ignore'): #all-NaN metrics (empty catalog) give NaN bands
+            bands = {
+                metric: dict(zip(['p10', 'p50', 'p90'], np.nanpercentile(values, [10, 50, 90]).tolist()))
+                for metric, values in [('revenue_efficiency', efficiency_total), ('loops_per_year', loops_mean)]
+            }
+        result = {
+            'draws': {'revenue_efficiency': efficiency_total, 'loops_per_year': loops_mean},
+            'bands': bands,
+            'excluded_skus': excluded, #per draw, left out of revenue efficiency like in summarize()
+            'baseline': {key: self.baseline[key] for key in ['revenue_efficiency', 'loops_per_year']}
+        }
+        self._simulations[key] = result
+        return result
+
+def _sample(rng, spec, size):
+    name, mean, spread = spec
+    if spread <= 0:
+        return np.full(size, float(mean))
+    if name == 'normal':
+        return rng.normal(mean, spread, size)
+    if name == 'uniform':
+        return rng.uniform(mean - spread, mean + spread, size)
+    if name == 'triangular':
+        return rng.triangular(mean - spread, mean, mean + spread, size)
+    raise ValueError(f"Unknown distribution: {name}")
+
+def _simulate_chunk(index, base_cycle, revenue, draws, inventory, payment, seed, block_elements=1_000_000):
+    """Worker: per-draw efficiency sum, loops sum, loops count and excluded-SKU count for one chunk"""
+    inventory_rng, payment_rng = [
+        np.random.default_rng(child) for child in np.random.SeedSequence([seed, index]).spawn(2)
+    ]
+    # Blank cycles are NaN in every draw, so drop them once (shifts are never NaN)
+    known = ~np.isnan(base_cycle)
+    base_cycle = base_cycle[known].astype(float)
+    revenue = revenue[known].astype(float)
+
+    efficiency_total = np.zeros(draws)
+    loops_total = np.zeros(draws)
+    excluded = np.zeros(draws)
+    block = max(1, block_elements // max(len(base_cycle), 1)) #draws per block, bounds memory
+    for start in range(0, draws, block):
+        size = (min(block, draws - start), len(base_cycle))
+        rows = slice(start, start + size[0])
+        # Same formulas as summarize()/sweep(), for a whole block of draws at once
+        cycle = _sample(inventory_rng, inventory, size)
+        cycle += _sample(payment_rng, payment, size)
+        np.subtract(base_cycle, cycle, out=cycle)
+        loops = np.maximum(cycle, 1)
+        np.divide(365, loops, out=loops)
+        efficiency_total[rows] = np.nansum(guarded_efficiency(revenue, cycle), axis=1)
+        loops_total[rows] = loops.sum(axis=1)
+        excluded[rows] = (cycle <= 0).sum(axis=1)
+    return efficiency_total, loops_total, np.full(draws, float(len(base_cycle))), excluded
+
+def guarded_efficiency(revenue, cash_cycle_days):
+    """revenue / cash cycle for totals: cycles under a day count as one day (the loops_per_year
+    clip) and SKUs with a zero or negative cycle are left out (NaN), so one SKU can't make a
+    total infinite or flip its sign"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(cash_cycle_days > 0, revenue / np.maximum(cash_cycle_days, 1), np.nan)
+
+def _nanmean(values):
+    # Same as pandas .mean(): skip NaN, NaN if nothing is left
+    valid = values[~np.isnan(values)]
+    return valid.mean() if len(valid) else np.nan
@@ -0,0 +1,105 @@
+"""Processed datasets saved as Arrow IPC files and reopened through a memory map
+
+A snapshot is the enriched frame (metrics, anomaly labels, priority scores) written
+uncompressed in Arrow's file format, so loading maps the file instead of reading it:
+numeric columns without blanks come back as zero-copy, read-only views of the mapping.
+The source fingerprint and processing version travel in the schema metadata, which lets
+`list` describe a snapshot without reading its columns.
+"""
+import json
+import os
+import re
+from datetime import datetime, timezone
+import pandas as pd
+import pyarrow as pa
+from config import Config
+from modules.caching import atomic_write
+from modules.data_processor import PROCESSING_VERSION
+
+METADATA_KEY = b'productvelocity'
+SUFFIX = '.arrow'
+ARROW_TYPES = {pa.string(): pd.StringDtype('pyarrow'), pa.large_string(): pd.StringDtype('pyarrow')}
+
+class SnapshotStore:
+    """Local directory of dataset snapshots, one `<snapshot_id>.arrow` file each"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def save(self, df, name, source_fingerprint=None):
+        """Write df as a snapshot and return its metadata (same name + source replaces the old one)"""
+        os.makedirs(self.root, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9_-]+', '-', name).strip('-') or 'dataset'
+        snapshot_id = f"{slug}-{source_fingerprint[:12]}" if source_fingerprint else slug
+        meta = {
+            'snapshot_id': snapshot_id,
+            'name': name,
+            'source_fingerprint': source_fingerprint,
+            'processing_version': PROCESSING_VERSION,
+            'rows': len(df),
+            'columns': list(df.columns),
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds')
+        }
+
+        table = pa.Table.from_pandas(df, preserve_index=False) #pandas metadata keeps category/string dtypes
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            METADATA_KEY: json.dumps(meta).encode()
+        })
+
+        def write(tmp_path):
+            with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        path = self._path(snapshot_id)
+        atomic_write(path, write) #a half-written file is never listed
+        meta['bytes'] = os.path.getsize(path)
+        return meta
+
+    def list(self):
+        """Metadata of every snapshot, newest first. `stale` means an older processing version"""
+        if not os.path.isdir(self.root):
+            return []
+        snapshots = []
+        for filename in os.listdir(self.root):
+            if not filename.endswith(SUFFIX):
+                continue
+            path = os.path.join(self.root, filename)
+            try:
+                meta = self._read_meta(path)
+            except (OSError, pa.ArrowInvalid, ValueError, KeyError):
+                continue #unreadable or not one of ours
+            meta['bytes'] = os.path.getsize(path)
+            meta['stale'] = meta['processing_version'] != PROCESSING_VERSION
+            snapshots.append(meta)
+        return sorted(snapshots, key=lambda meta: meta['created'], reverse=True)
+
+    def load(self, snapshot_id):
+        """(df, metadata) for a snapshot, read through a memory map"""
+        source = pa.memory_map(self._path(snapshot_id), 'r') #buffers keep the mapping alive after this returns
+        reader = pa.ipc.open_file(source)
+        meta = json.loads(reader.schema.metadata[METADATA_KEY])
+        meta['stale'] = meta['processing_version'] != PROCESSING_VERSION
+        # split_blocks skips pandas' block consolidation, which would copy every numeric column.
+        # Text stays in the mapped Arrow buffers instead of becoming Python strings
+        df = reader.read_all().to_pandas(split_blocks=True, types_mapper=ARROW_TYPES.get)
+        return df, meta
+
+    def delete(self, snapshot_id):
+        try:
+            os.remove(self._path(snapshot_id))
+        except FileNotFoundError:
+            pass
+
+    def _path(self, snapshot_id):
+        if os.path.basename(snapshot_id) != snapshot_id:
+            raise ValueError(f"Invalid snapshot id: {snapshot_id}")
+        return os.path.join(self.root, f"{snapshot_id}{SUFFIX}")
+
+    @staticmethod
+    def _read_meta(path):
+        with pa.memory_map(path, 'r') as source: #only the footer and schema are touched
+            return json.loads(pa.ipc.open_file(source).schema.metadata[METADATA_KEY])
+
+# Shared by every session (snapshots are files, so they also survive restarts)
+snapshot_store = SnapshotStore(Config.SNAPSHOT_DIR)
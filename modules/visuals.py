@@ -1,26 +1,66 @@
-import plotly.express as px #quick charts, minimal config
-import plotly.graph_objects as go #more flexible for bar charts and lines
-from plotly.subplots import make_subplots #Combining multiple charts into one layout
+import hashlib
+import json
+import numpy as np
+import pandas as pd
+from modules.caching import LRUCache
+from modules.instrumentation import stage
+
+# Built figures shared across reruns, keyed by chart + dataset fingerprint + arguments
+_figure_cache = LRUCache(16)
 
 class Visualizations:
+    def __init__(self, large_data_threshold=5000):
+        self.large_data_threshold = large_data_threshold #above this many SKUs use the large-data mode
+
+    @staticmethod
+    def dataset_key(df):
+        """Content fingerprint of a dataset, used to reuse figures across reruns"""
+        return hashlib.sha256(pd.util.hash_pandas_object(df, index=True).values.tobytes()).hexdigest()
+
+    #Build a chart once per dataset (and arguments), then hand back the same figure
+    def cached_figure(self, name, df, *args, key=None):
+        large = len(df) > self.large_data_threshold
+        cache_key = (name, key or self.dataset_key(df), json.dumps(args, sort_keys=True, default=str), large)
+        fig = _figure_cache.get(cache_key)
+        if fig is not None:
+            return fig
+
+        with stage(f"chart_build:{name}", rows=len(df)):
+            fig = getattr(self, name)(df, *args, large=large)
+        _figure_cache.put(cache_key, fig)
+        return fig
     
     #See how product categories contribute to revenue + where cash is stuck
     @staticmethod
-    def cash_cycle_sunburst(df):
-        fig = px.sunburst(
-            df,
-            path=['category', 'sku'],
-            values='revenue',
-            color='cash_cycle_days',
-            hover_data=['profit', 'loops_per_year'],
-            color_continuous_scale='RdYlGn_r'
-        )
+    def cash_cycle_sunburst(rollup, large=False):
+        """Sunburst from a CategoryRollup: categories, their top SKUs and one "Other" slice each"""
+        import plotly.graph_objects as go #loaded on the first chart, not at startup
+        nodes = rollup.nodes
+        fig = go.Figure(go.Sunburst(
+            ids=nodes['id'],
+            labels=nodes['label'],
+            parents=nodes['parent'],
+            values=np.where(nodes['parent'] == '', 0, nodes['revenue'].fillna(0)), #categories = sum of children
+            branchvalues='remainder',
+            marker=dict(
+                colors=nodes['cash_cycle_days'], #revenue-weighted for categories and "Other"
+                colorscale='RdYlGn_r',
+                colorbar=dict(title='cash_cycle_days')
+            ),
+            customdata=nodes[['revenue', 'profit', 'loops_per_year', 'cash_cycle_days', 'skus']],
+            hovertemplate=(
+                "<b>%{label}</b><br>revenue=%{customdata[0]:,.2f}<br>profit=%{customdata[1]:,.2f}"
+                "<br>loops_per_year=%{customdata[2]:.1f}<br>cash_cycle_days=%{customdata[3]:.1f}"
+                "<br>SKUs=%{customdata[4]:,}<extra></extra>"
+            )
+        ))
         fig.update_layout(margin=dict(t=0, l=0, r=0, b=0)) #removes excess margina nd padding
         return fig
-    
+
     #Rank SKUs visually by revenue, profit margin, and capital efficiency
     @staticmethod
-    def priority_matrix(df):
+    def priority_matrix(df, large=False):
+        import plotly.express as px
         fig = px.scatter(
             df,
             x='loops_per_year',
@@ -32,17 +72,26 @@ class Visualizations:
                 'loops_per_year': 'Capital Velocity (Loops/Year)',
                 'margin_per_unit': 'Unit Margin ($)'
             },
-            title='Portfolio Priority Matrix'
-        )
-        fig.update_traces( #adds a dark border around each bubble
-            marker=dict(line=dict(width=1, color='DarkSlateGrey')),
-            selector=dict(mode='markers')
+            title='Portfolio Priority Matrix',
+            render_mode='webgl' if large else 'auto' #one WebGL trace instead of one SVG node per SKU
         )
+        if not large:
+            fig.update_traces( #adds a dark border around each bubble
+                marker=dict(line=dict(width=1, color='DarkSlateGrey')),
+                selector=dict(mode='markers')
+            )
         return fig
     
-    #Compare your business vs. industry averages for inventory, payment gap, and loops
+    #Compare your business vs. the industry's middle 50% (and median) for inventory, payment gap, and loops
+    #benchmark is IndustryBenchmarks.summary(): {metric: {'p25', 'median', 'p75'}}
     @staticmethod
-    def benchmark_comparison(df, industry):
+    def benchmark_comparison(df, benchmark, large=False):
+        if large: #per-SKU bars don't scale, show how SKUs are distributed instead
+            return Visualizations._benchmark_distribution(df, benchmark)
+
+        import plotly.graph_objects as go #more flexible for bar charts and lines
+        from plotly.subplots import make_subplots #Combining multiple charts into one layout
+
         fig = make_subplots(rows=1, cols=3, subplot_titles=(
             'Inventory Days', 'Payment Gap', 'Capital Loops'
         ))
@@ -56,11 +105,7 @@ class Visualizations:
             ),
             row=1, col=1
         )
-        fig.add_hline( #Draws a dotted horizontal line representing the industry average
-            y=industry['inventory_days'],
-            line_dash='dot',
-            row=1, col=1
-        )
+        Visualizations._benchmark_band(fig, benchmark['inventory_days'], col=1) #Shaded band = industry p25-p75, dotted line = industry median
         
         # Payment Gap comparison
         #Plots how long it takes each SKU to collect money after paying suppliers
@@ -73,11 +118,7 @@ class Visualizations:
             ),
             row=1, col=2
         )
-        fig.add_hline(
-            y=industry['payment_gap'],
-            line_dash='dot',
-            row=1, col=2
-        )
+        Visualizations._benchmark_band(fig, benchmark['payment_gap'], col=2)
         
         # Loops comparison
         # Shows how many times per year your capital is being reinvested per SKU
@@ -89,12 +130,124 @@ class Visualizations:
             ),
             row=1, col=3
         )
-        fig.add_hline(
-            y=industry['loops_per_year'],
-            line_dash='dot',
-            row=1, col=3
-        )
+        Visualizations._benchmark_band(fig, benchmark['loops_per_year'], col=3)
         
         #Final layout keeps things compact and removes legend (each bar already labeled by SKU)
         fig.update_layout(height=400, showlegend=False)
-        return fig
\ No newline at end of file
+        return fig
+    
+    #Whole scenario response surface: every (inventory, payment) pair at once
+    @staticmethod
+    def scenario_heatmap(sweep, metric='revenue_efficiency', current=None):
+        import plotly.graph_objects as go
+        titles = {
+            'revenue_efficiency': 'Total Revenue Efficiency',
+            'loops_per_year': 'Mean Capital Loops/Year'
+        }
+        z = np.asarray(sweep[metric], dtype=float)
+        fig = go.Figure(go.Heatmap(
+            z=np.where(np.isfinite(z), z, np.nan), #non-finite cells render as gaps instead of blanking the scale
+            x=sweep['payment_improvement'],
+            y=sweep['inv_reduction'],
+            colorscale='RdYlGn',
+            colorbar=dict(title=titles[metric]),
+            hovertemplate='Inventory -%{y} days<br>Payment -%{x} days<br>%{z:,.2f}<extra></extra>'
+        ))
+        if current is not None: #marks where the sliders currently sit
+            fig.add_scatter(
+                x=[current[1]],
+                y=[current[0]],
+                mode='markers',
+                marker=dict(symbol='x', size=12, color='black'),
+                showlegend=False,
+                hoverinfo='skip'
+            )
+        fig.update_layout(
+            title=titles[metric],
+            xaxis_title='Improve Customer Payment Days By',
+            yaxis_title='Reduce Inventory Days By',
+            height=400
+        )
+        return fig
+
+    #Monte Carlo outcome spread: histogram of the simulated totals with P10/P50/P90 and today's value
+    @staticmethod
+    def simulation_bands(simulation, bins=40):
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+        metrics = [
+            ('revenue_efficiency', 'Total Revenue Efficiency'),
+            ('loops_per_year', 'Mean Capital Loops/Year')
+        ]
+        fig = make_subplots(rows=1, cols=2, subplot_titles=[title for _, title in metrics])
+
+        for col, (metric, title) in enumerate(metrics, start=1):
+            values = simulation['draws'][metric]
+            values = values[np.isfinite(values)]
+            counts, edges = np.histogram(values, bins=bins) #pre-binned, draws never go to the browser
+            fig.add_trace(
+                go.Bar(
+                    x=(edges[:-1] + edges[1:]) / 2,
+                    y=counts,
+                    width=np.diff(edges),
+                    name=title,
+                    hovertemplate='%{x:,.2f}: %{y:,} draws<extra></extra>'
+                ),
+                row=1, col=col
+            )
+            band = simulation['bands'][metric]
+            for label, dash in [('p10', 'dot'), ('p50', 'solid'), ('p90', 'dot')]:
+                fig.add_vline(x=band[label], line_dash=dash, annotation_text=label.upper(), row=1, col=col)
+            fig.add_vline( #where the catalog is today, before any shifts
+                x=simulation['baseline'][metric],
+                line_color='grey',
+                annotation_text='today',
+                annotation_position='bottom right',
+                row=1, col=col
+            )
+
+        fig.update_layout(height=350, showlegend=False, bargap=0)
+        fig.update_yaxes(title_text='Draws', row=1, col=1)
+        return fig
+
+    #Large-data version: a pre-binned histogram per metric, so payload size follows bin count not SKU count
+    @staticmethod
+    def _benchmark_distribution(df, benchmark, bins=40):
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+        metrics = [
+            ('Inventory Days', df['inventory_days'], benchmark['inventory_days']),
+            ('Payment Gap', df['customer_payment_days'] - df['supplier_payment_days'], benchmark['payment_gap']),
+            ('Capital Loops', df['loops_per_year'], benchmark['loops_per_year'])
+        ]
+        fig = make_subplots(rows=1, cols=3, subplot_titles=[title for title, _, _ in metrics])
+
+        for col, (title, values, band) in enumerate(metrics, start=1):
+            values = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)
+            values = values[np.isfinite(values)]
+            counts, edges = np.histogram(values, bins=bins)
+            fig.add_trace(
+                go.Bar(
+                    x=(edges[:-1] + edges[1:]) / 2,
+                    y=counts,
+                    width=np.diff(edges),
+                    name=title,
+                    hovertemplate='%{x:.1f}: %{y:,} SKUs<extra></extra>'
+                ),
+                row=1, col=col
+            )
+            Visualizations._benchmark_band(fig, band, col=col, vertical=True) #industry range across the distribution
+
+        fig.update_layout(height=400, showlegend=False, bargap=0)
+        fig.update_yaxes(title_text='SKUs', row=1, col=1)
+        return fig
+
+    @staticmethod
+    def _benchmark_band(fig, band, col, vertical=False):
+        """Industry p25-p75 as a shaded band plus a dotted median line"""
+        if vertical:
+            fig.add_vrect(x0=band['p25'], x1=band['p75'], fillcolor='grey', opacity=0.15, line_width=0, row=1, col=col)
+            fig.add_vline(x=band['median'], line_dash='dot', row=1, col=col)
+        else:
+            fig.add_hrect(y0=band['p25'], y1=band['p75'], fillcolor='grey', opacity=0.15, line_width=0, row=1, col=col)
+            fig.add_hline(y=band['median'], line_dash='dot', row=1, col=col)
@@ -0,0 +1,81 @@
+"""Background warm-up: load the slow backends once the first page has been drawn
+
+The app imports Prophet, scikit-learn and Plotly only when a feature first needs
+them. The warm-up does that loading on a daemon thread (once per process), so the first
+forecast / anomaly run / chart is not the one paying for it. Each step's duration is kept
+for the debug panel and sent to the stage instrumentation as `warmup:<step>`. Starting the
+segment forecast worker processes is opt-in (WARMUP_FORECAST_WORKERS=1), since it costs one
+process per worker even if nobody runs a segment forecast.
+"""
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+from config import Config
+from modules import instrumentation
+
+_lock = threading.Lock()
+_thread = None
+_timings = {} #step -> {'seconds', 'ok', 'error'}
+
+def _prophet():
+    # First fit loads cmdstanpy and the compiled Stan model. Same 12 month-end points as the real forecast
+    from prophet import Prophet
+    history = pd.DataFrame({
+        'ds': pd.date_range('2023-01-01', periods=12, freq='ME'),
+        'y': np.linspace(100, 120, 12)
+    })
+    Prophet().fit(history)
+
+def _anomaly_model():
+    from sklearn.ensemble import IsolationForest
+    IsolationForest(n_estimators=10, random_state=0).fit(np.random.default_rng(0).random((64, 6)))
+
+def _charts():
+    import plotly.express as px
+    px.scatter(pd.DataFrame({'x': [0, 1], 'y': [0, 1]}), x='x', y='y').to_json()
+
+def _forecast_workers():
+    # Start the segment forecast pool now; its initializer imports Prophet in every worker
+    from modules.multi_forecast import worker_pool
+    workers = Config.SEGMENT_FORECAST_WORKERS or os.cpu_count()
+    pool = worker_pool(workers)
+    for future in [pool.submit(time.sleep, 0) for _ in range(workers)]: #one task per worker spawns them all
+        future.result()
+
+STEPS = [
+    ('charts', _charts),
+    ('anomaly_model', _anomaly_model),
+    ('prophet', _prophet)
+]
+if Config.WARMUP_FORECAST_WORKERS:
+    STEPS.append(('forecast_workers', _forecast_workers))
+
+def _run():
+    for name, step in STEPS:
+        started = time.perf_counter()
+        error = None
+        try:
+            step()
+        except Exception as e: #a missing optional backend just stays cold
+            error = f"{type(e).__name__}: {e}"
+        seconds = time.perf_counter() - started
+        with _lock:
+            _timings[name] = {'seconds': round(seconds, 4), 'ok': error is None, 'error': error}
+        if instrumentation.ENABLED:
+            instrumentation.record(f"warmup:{name}", seconds, ok=error is None)
+
+def start():
+    """Start the warm-up thread (no-op if it already ran in this process)"""
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name='warmup', daemon=True)
+            _thread.start()
+    return _thread
+
+def timings():
+    """Finished steps so far: {step: {'seconds', 'ok', 'error'}}"""
+    with _lock:
+        return dict(_timings)
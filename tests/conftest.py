@@ -0,0 +1,19 @@
+import io
+import pytest
+from benchmarks.synthetic import make_catalog
+from modules.data_processor import DataProcessor
+from modules.ingestion import CSVIngestor
+
+@pytest.fixture(scope='session')
+def processor():
+    return DataProcessor()
+
+@pytest.fixture(scope='session')
+def catalog_csv():
+    """Small synthetic export without blanks (integer day columns, as clients usually send them)"""
+    return make_catalog(2000, seed=7, nan_rate=0, messy_headers=False).to_csv(index=False).encode()
+
+@pytest.fixture
+def catalog(processor, catalog_csv):
+    """The catalog as the app sees it after an upload"""
+    return CSVIngestor(processor).ingest(io.BytesIO(catalog_csv))
@@ -0,0 +1,30 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from modules.anomaly_model import AnomalyDetector
+from modules.data_processor import DataProcessor
+from modules.ingestion import CSVIngestor
+from modules.memory import compact_frame
+
+def test_sessions_fitting_the_same_data_share_one_saved_model(catalog, tmp_path):
+    X = catalog[['units_sold', 'unit_price', 'unit_cost']]
+    detectors = [AnomalyDetector(n_jobs=1, max_models=2, model_dir=str(tmp_path)) for _ in range(4)]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        labels = list(pool.map(lambda detector: detector.fit_predict(X), detectors))
+
+    for other in labels[1:]:
+        np.testing.assert_array_equal(other, labels[0])
+    assert [p.suffix for p in tmp_path.iterdir()] == ['.joblib'] #one model, no temp files left behind
+
+def test_compacted_frame_reuses_the_model_fitted_at_ingest(catalog_csv):
+    detector = AnomalyDetector(n_jobs=1)
+    processor = DataProcessor(detector=detector)
+    df = compact_frame(CSVIngestor(processor).ingest(io.BytesIO(catalog_csv)))
+    fitted = detector._models.items()[0][1]
+
+    delta = pd.read_csv(io.BytesIO(catalog_csv)).head(5).assign(units_sold=1)
+    processor.upsert(df, CSVIngestor(processor).read(io.BytesIO(delta.to_csv(index=False).encode())))
+
+    assert len(detector._models) == 1
+    assert processor.anomaly_model(df) is fitted #no refit after the dtypes changed
@@ -0,0 +1,13 @@
+import pytest
+from batch import output_stems, run
+
+def test_same_named_files_get_distinct_output_stems(tmp_path):
+    paths = [str(tmp_path / 'in' / 'a' / 'x.csv'), str(tmp_path / 'in' / 'b' / 'x.csv')]
+    assert output_stems(paths) == {paths[0]: 'a__x', paths[1]: 'b__x'}
+    assert output_stems(paths[:1]) == {paths[0]: 'x'}
+
+def test_run_refuses_colliding_output_stems(tmp_path):
+    paths = [str(tmp_path / 'a__x.csv'), str(tmp_path / 'a' / 'x.csv')]
+    with pytest.raises(ValueError, match='a__x'):
+        run(paths, str(tmp_path / 'out'))
+    assert not (tmp_path / 'out').exists()
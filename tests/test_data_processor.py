@@ -0,0 +1,72 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from modules.data_processor import HeaderMappingCache
+from modules.ingestion import CSVIngestor
+from modules.insights_engine import InsightsEngine
+
+METRIC_COLUMNS = ['units_sold', 'unit_price', 'margin_per_unit', 'revenue', 'profit',
+                  'cash_cycle_days', 'loops_per_year', 'revenue_efficiency', 'priority_score']
+
+def test_headers_mapping_to_the_same_column_keep_the_best_match(processor, catalog_csv):
+    raw = pd.read_csv(io.BytesIO(catalog_csv))
+    raw.insert(3, 'Inventory Dayz', raw['inventory_days'] + 1) #also fuzzy-matches inventory_days, but worse
+    df = CSVIngestor(processor).ingest(io.BytesIO(raw.to_csv(index=False).encode()))
+
+    assert list(df.columns).count('inventory_days') == 1
+    assert 'inventory_dayz' in df.columns
+    np.testing.assert_array_equal(df['inventory_days'].to_numpy(), raw['inventory_days'].to_numpy())
+
+def test_header_cache_survives_concurrent_puts(tmp_path):
+    cache = HeaderMappingCache(max_entries=4, path=str(tmp_path / 'mappings.json'))
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: cache.put(f"key-{i}", [[0, 'units_sold']]), range(64)))
+
+    assert len(cache._entries) == 4
+    assert len(HeaderMappingCache(max_entries=4, path=cache.path)._entries) == 4
+    assert [p.name for p in tmp_path.iterdir()] == ['mappings.json'] #no temp files left behind
+
+def test_upsert_matches_full_recompute(processor, catalog, catalog_csv):
+    raw = pd.read_csv(io.BytesIO(catalog_csv))
+    updates = raw.sample(40, random_state=0).assign(units_sold=lambda d: d['units_sold'] * 2)
+    new = raw.head(10).assign(sku=[f"NEW-{i}" for i in range(10)], category='Brand New')
+    delta_csv = pd.concat([updates, new], ignore_index=True).to_csv(index=False).encode()
+
+    model = processor.anomaly_model(catalog)
+    merged, touched = processor.upsert(catalog, CSVIngestor(processor).read(io.BytesIO(delta_csv)), model)
+
+    # Same rows through a full recompute: updated SKUs in place, new ones appended
+    expected = raw.set_index('sku')
+    expected.loc[updates['sku'], 'units_sold'] = updates.set_index('sku')['units_sold']
+    expected = pd.concat([expected.reset_index(), new], ignore_index=True)
+    expected = processor.calculate_row_metrics(
+        CSVIngestor(processor).read(io.BytesIO(expected.to_csv(index=False).encode()))
+    )
+
+    assert merged['sku'].tolist() == expected['sku'].tolist()
+    np.testing.assert_allclose(
+        merged[METRIC_COLUMNS].to_numpy(dtype=float), expected[METRIC_COLUMNS].to_numpy(dtype=float),
+        rtol=1e-6, equal_nan=True
+    )
+    assert sorted(touched.tolist()) == sorted(
+        np.flatnonzero(merged['sku'].isin(pd.concat([updates['sku'], new['sku']]))).tolist()
+    )
+
+    untouched = np.setdiff1d(np.arange(len(catalog)), touched)
+    np.testing.assert_array_equal(merged['anomaly'].to_numpy()[untouched], catalog['anomaly'].to_numpy()[untouched])
+
+def test_incremental_insights_match_a_fresh_engine(processor, catalog, catalog_csv):
+    raw = pd.read_csv(io.BytesIO(catalog_csv))
+    delta = raw.sample(25, random_state=1).assign(inventory_days=90, unit_price=lambda d: d['unit_cost'] + 0.5)
+    delta_csv = delta.to_csv(index=False).encode()
+
+    engine = InsightsEngine(catalog)
+    engine.priority_levels()
+    engine.evaluate_rules()
+    merged, touched = processor.upsert(catalog, CSVIngestor(processor).read(io.BytesIO(delta_csv)))
+    engine.update(merged, touched)
+
+    fresh = InsightsEngine(merged)
+    pd.testing.assert_frame_equal(engine.evaluate_rules(), fresh.evaluate_rules())
+    np.testing.assert_array_equal(engine.priority_levels(), fresh.priority_levels())
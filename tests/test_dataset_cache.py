@@ -0,0 +1,47 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from modules.dataset_cache import DatasetCache
+from modules.memory import frame_bytes
+
+def frame(rows):
+    return pd.DataFrame({'value': range(rows)}, dtype='int64')
+
+def test_least_recently_used_frames_are_evicted_to_fit_the_budget():
+    size = frame_bytes(frame(1000))
+    cache = DatasetCache(budget_bytes=int(size * 2.5))
+    cache.put('a', frame(1000))
+    cache.put('b', frame(1000))
+    assert cache.get('a') is not None #a is now more recent than b
+
+    cache.put('c', frame(1000))
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert cache.stats() == {'entries': 2, 'bytes': 2 * size, 'budget_bytes': int(size * 2.5)}
+
+    cache.put('huge', frame(10_000)) #bigger than the whole budget, not cached
+    assert cache.get('huge') is None and cache.stats()['entries'] == 2
+
+def test_concurrent_requests_for_one_key_process_it_once():
+    cache = DatasetCache(budget_bytes=2**20)
+    calls = []
+    started = threading.Barrier(8)
+
+    def process():
+        calls.append(1)
+        time.sleep(0.1) #long enough for every other thread to be waiting on the key
+        return frame(10)
+
+    def request(_):
+        started.wait()
+        return cache.get_or_process('key', process)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(request, range(8)))
+
+    assert len(calls) == 1
+    assert sorted(hit for _, hit in results) == [False] + [True] * 7
+    for df, _ in results:
+        pd.testing.assert_frame_equal(df, frame(10))
+    assert cache._key_locks == {}
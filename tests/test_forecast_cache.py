@@ -0,0 +1,27 @@
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from modules import insights_engine
+from modules.forecast_cache import ForecastCache
+from modules.insights_engine import InsightsEngine
+
+def test_concurrent_puts_of_one_key_all_succeed(tmp_path):
+    cache = ForecastCache(max_entries=2, cache_dir=str(tmp_path))
+    forecast = pd.DataFrame({'ds': pd.date_range('2024-01-01', periods=3), 'yhat': [1.0, 2.0, 3.0]})
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: cache.put('same-key', {'run': i}, forecast), range(32)))
+
+    assert [p.name for p in tmp_path.iterdir()] == ['same-key.pkl'] #no temp files left behind
+    pd.testing.assert_frame_equal(ForecastCache(cache_dir=str(tmp_path)).get('same-key')['forecast'], forecast)
+
+def test_second_forecast_of_the_same_data_comes_from_the_cache(catalog, monkeypatch):
+    cache = ForecastCache(max_entries=2)
+    monkeypatch.setattr(insights_engine, 'forecast_cache', cache)
+    first = InsightsEngine(catalog).generate_cash_flow_forecast()
+    assert first is not None and len(cache._entries) == 1
+
+    fits = []
+    monkeypatch.setattr('prophet.Prophet.fit', lambda *args, **kwargs: fits.append(args))
+    second = InsightsEngine(catalog.copy()).generate_cash_flow_forecast()
+
+    assert fits == []
+    pd.testing.assert_frame_equal(second, first)
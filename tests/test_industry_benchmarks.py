@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+from modules.industry_benchmarks import IndustryBenchmarks, ordinal
+
+@pytest.fixture
+def benchmarks(tmp_path):
+    path = tmp_path / 'benchmarks.csv'
+    pd.DataFrame({
+        'industry': ['retail'] * 3,
+        'size': ['mid'] * 3,
+        'metric': ['inventory_days', 'payment_gap', 'loops_per_year'],
+        'p0': [10, -10, 2],
+        'p50': [40, 10, 8],
+        'p100': [90, 30, 20]
+    })[['industry', 'size', 'metric', 'p100', 'p0', 'p50']].to_csv(path, index=False) #columns out of order on purpose
+    return IndustryBenchmarks(str(path))
+
+def test_percentile_ranks_interpolate_within_the_industry(benchmarks):
+    df = pd.DataFrame({
+        'inventory_days': [10, 25, 40, 65, 200, np.nan],
+        'customer_payment_days': [30, 30, 30, 30, 30, 30],
+        'supplier_payment_days': [50, 30, 20, 10, 0, 30],
+        'loops_per_year': [1, 5, 8, 14, 20, 8]
+    }, index=[5, 6, 7, 8, 9, 10])
+    ranks = benchmarks.percentile_ranks(df, 'retail', 'mid')
+
+    assert list(ranks.index) == list(df.index)
+    np.testing.assert_allclose(ranks['inventory_days_pct'], [0, 25, 50, 75, 100, np.nan])
+    np.testing.assert_allclose(ranks['payment_gap_pct'], [0, 25, 50, 75, 100, 25]) #gap below p0 clamps to 0
+    np.testing.assert_allclose(ranks['loops_per_year_pct'], [0, 25, 50, 75, 100, 50])
+
+def test_summary_gives_quartile_bands(benchmarks):
+    assert benchmarks.summary('retail', 'mid')['inventory_days'] == {'p25': 25.0, 'median': 40.0, 'p75': 65.0}
+
+@pytest.mark.parametrize('value, text', [
+    (1, '1st'), (2, '2nd'), (3, '3rd'), (4, '4th'), (11, '11th'), (12, '12th'), (13, '13th'),
+    (21.6, '22nd'), (62.2, '62nd'), (101, '101st'), (111, '111th'), (0, '0th'), (np.nan, 'n/a')
+])
+def test_ordinal(value, text):
+    assert ordinal(value) == text
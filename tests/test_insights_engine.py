@@ -0,0 +1,105 @@
+import io
+import warnings
+import pytest
+import numpy as np
+import pandas as pd
+from modules.ingestion import CSVIngestor
+from modules.insights_engine import InsightsEngine
+
+# The row-by-row implementation the vectorized rules engine replaced, kept as the reference
+def baseline_priority(score):
+    if score > 0.7:
+        return 'High'
+    elif score > 0.4:
+        return 'Medium'
+    return 'Low'
+
+def baseline_actions(row):
+    actions = []
+    if row['inventory_days'] > 45:
+        actions.append(('inventory', 'high', f"Reduce inventory days from {row['inventory_days']} to under 45"))
+    if row['margin_per_unit'] < 1:
+        actions.append(('margin', 'critical', f"Increase margin from ${row['margin_per_unit']:.2f} to >$1.00"))
+    payment_gap = row['customer_payment_days'] - row['supplier_payment_days']
+    if payment_gap > 20:
+        actions.append(('payments', 'medium', f"Reduce payment gap from {payment_gap} days to <20"))
+    return actions
+
+def test_generate_insights_matches_row_by_row_baseline(catalog, catalog_csv):
+    # The baseline read the CSV with default dtypes, so its text shows integer days as "59"
+    raw = pd.read_csv(io.BytesIO(catalog_csv))
+    raw['margin_per_unit'] = raw['unit_price'] - raw['unit_cost']
+
+    insights = InsightsEngine(catalog).generate_insights()
+
+    assert len(insights) == len(raw)
+    for insight, (i, row), score in zip(insights, raw.iterrows(), catalog['priority_score']):
+        assert insight['sku'] == row['sku']
+        assert insight['category'] == row['category']
+        assert insight['priority'] == baseline_priority(score)
+        assert [(a['type'], a['severity'], a['action']) for a in insight['actions']] == baseline_actions(row)
+
+def test_fractional_day_values_print_as_typed(processor, catalog_csv):
+    raw = pd.read_csv(io.BytesIO(catalog_csv))
+    fraction = np.random.default_rng(0).integers(0, 10, len(raw)) / 10
+    for col in ['inventory_days', 'customer_payment_days', 'supplier_payment_days']:
+        raw[col] = raw[col] + fraction #e.g. 52.3, whose float32 value prints as 52.29999923706055
+    df = CSVIngestor(processor).ingest(io.BytesIO(raw.to_csv(index=False).encode()))
+    raw['margin_per_unit'] = raw['unit_price'] - raw['unit_cost']
+
+    insights = InsightsEngine(df).generate_insights()
+    for insight, (i, row) in zip(insights, raw.iterrows()):
+        assert [(a['type'], a['severity'], a['action']) for a in insight['actions']] == baseline_actions(row)
+
+def test_float_day_columns_keep_their_decimals():
+    df = pd.DataFrame({
+        'sku': ['A', 'B'],
+        'category': ['x', 'x'],
+        'inventory_days': [59.0, np.nan], #a blank makes read_csv give floats, shown as "59.0"
+        'margin_per_unit': [5.0, 5.0],
+        'customer_payment_days': [30.0, 30.0],
+        'supplier_payment_days': [30.0, 30.0],
+        'priority_score': [0.5, 0.5]
+    })
+    actions = InsightsEngine(df).generate_insights()[0]['actions']
+    assert [a['action'] for a in actions] == ["Reduce inventory days from 59.0 to under 45"]
+
+def test_no_rule_hits_gives_empty_frame_without_warnings(catalog):
+    quiet = catalog.assign(inventory_days=np.float32(10), margin_per_unit=5.0, customer_payment_days=np.float32(0))
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        hits = InsightsEngine(quiet).evaluate_rules()
+    assert hits.empty
+    assert list(hits.columns) == ['row', 'sku', 'rule_id', 'severity', 'value']
+
+@pytest.mark.parametrize('filters', [
+    dict(),
+    dict(priorities=['High', 'Medium']),
+    dict(action_types=['inventory'], sort='asc'),
+    dict(severities=['critical'], categories=['Category 0', 'Category 2']),
+    dict(priorities=['Low'], action_types=['payments', 'margin'], sort=None)
+])
+def test_paged_insights_match_the_unpaged_list(catalog, filters):
+    engine = InsightsEngine(catalog)
+    everything = engine.generate_insights()
+    positions = engine.select_rows(**filters)
+
+    # Same filters applied to the full list
+    expected = [
+        pos for pos, insight in enumerate(everything)
+        if insight['priority'] in filters.get('priorities', [insight['priority']])
+        and insight['category'] in filters.get('categories', [insight['category']])
+        and (not filters.get('action_types') or any(a['type'] in filters['action_types'] for a in insight['actions']))
+        and (not filters.get('severities') or any(a['severity'] in filters['severities'] for a in insight['actions']))
+    ]
+    sort = filters.get('sort', 'desc')
+    if sort:
+        scores = catalog['priority_score'].to_numpy(dtype=float)[expected]
+        expected = np.asarray(expected)[np.argsort(-scores if sort == 'desc' else scores, kind='stable')].tolist()
+    assert positions.tolist() == expected
+
+    page_size = 25
+    paged = []
+    for start in range(0, len(positions), page_size): #the way the insights tab pages through them
+        paged += engine.generate_insights(rows=positions[start:start + page_size])
+    assert paged == [everything[pos] for pos in positions]
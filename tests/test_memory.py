@@ -0,0 +1,22 @@
+import io
+import pandas as pd
+from benchmarks.synthetic import make_catalog
+from modules.ingestion import CSVIngestor
+from modules.insights_engine import InsightsEngine
+from modules.memory import compact_frame, frame_bytes
+from modules.rollup import CategoryRollup
+
+def kpi_text(df):
+    # Formatted the way the KPI tiles show them
+    kpis = CategoryRollup(df).kpis()
+    return [f"${kpis['revenue']:,.2f}", f"{kpis['avg_cash_cycle_days']:.1f} days", f"{kpis['avg_loops_per_year']:.1f}x"]
+
+def test_compacting_saves_memory_without_changing_what_is_shown(processor):
+    csv = make_catalog(5000, seed=11).to_csv(index=False).encode() #with blanks and messy headers
+    df = CSVIngestor(processor).ingest(io.BytesIO(csv))
+    compact = compact_frame(df.copy())
+
+    assert isinstance(compact['category'].dtype, pd.CategoricalDtype)
+    assert frame_bytes(compact) < 0.75 * frame_bytes(df)
+    assert kpi_text(compact) == kpi_text(df)
+    assert InsightsEngine(compact).generate_insights() == InsightsEngine(df).generate_insights()
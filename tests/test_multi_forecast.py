@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+from modules.insights_engine import InsightsEngine
+from modules.multi_forecast import FORECAST_COLUMNS, MultiSeriesForecaster, build_series
+
+def test_short_series_fall_back_to_smoothing(catalog):
+    history = build_series(catalog, top_skus=5)
+    forecaster = MultiSeriesForecaster(horizon=6, min_points=100) #12 points each, all below min_points
+    result = forecaster.forecast(history)
+
+    assert list(result.columns) == FORECAST_COLUMNS
+    assert (result['model'] == 'exp_smoothing').all()
+    assert result['series_id'].nunique() == history['series_id'].nunique()
+    assert result.groupby('series_id').size().eq(12 + 6).all()
+    assert (result['ds'].dt.is_month_end).all()
+    assert np.isfinite(result['yhat']).all()
+
+def test_segment_forecasts_fit_prophet_per_series():
+    df = pd.DataFrame({
+        'sku': ['A', 'B', 'C'],
+        'category': ['Coffee', 'Coffee', 'Tea'],
+        'revenue': [1200.0, 600.0, 900.0]
+    })
+    result = InsightsEngine(df).generate_segment_forecasts(top_skus=0)
+
+    assert sorted(result['series_id'].unique()) == ['category:Coffee', 'category:Tea']
+    assert (result['model'] == 'prophet').all()
+    assert (result['level'] == 'category').all()
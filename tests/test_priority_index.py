@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from modules.priority_index import PriorityIndex
+
+def brute_force(df, k, categories=None, anomaly=None, cash_cycle_days=None, margin_per_unit=None):
+    mask = np.ones(len(df), dtype=bool)
+    if categories is not None:
+        mask &= df['category'].isin(categories).to_numpy()
+    if anomaly is not None:
+        mask &= (df['anomaly'].to_numpy() == -1) == anomaly
+    for column, bounds in [('cash_cycle_days', cash_cycle_days), ('margin_per_unit', margin_per_unit)]:
+        if bounds is not None:
+            values = df[column].to_numpy(dtype=float)
+            low, high = bounds
+            mask &= ~np.isnan(values)
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+    positions = np.flatnonzero(mask)
+    positions = positions[np.argsort(-df['priority_score'].to_numpy(dtype=float)[positions], kind='stable')]
+    return positions if k is None else positions[:k]
+
+@pytest.mark.parametrize('query', [
+    dict(k=10),
+    dict(k=None),
+    dict(k=25, categories=['Category 0', 'Category 3']),
+    dict(k=25, anomaly=True),
+    dict(k=7, anomaly=False, categories=['Category 1']),
+    dict(k=15, cash_cycle_days=(None, 30)),
+    dict(k=15, cash_cycle_days=(20, 40), margin_per_unit=(2, None)),
+    dict(k=30, categories=['Category 0', 'Category 2'], anomaly=True, margin_per_unit=(None, 5)),
+    dict(k=5, categories=['No such category']),
+    dict(k=10_000, anomaly=True)
+])
+def test_top_k_matches_brute_force(catalog, query):
+    catalog.loc[:20, 'category'] = np.nan #rows without a category only match unfiltered queries
+    expected = brute_force(catalog, **query)
+    np.testing.assert_array_equal(PriorityIndex(catalog).top_k_positions(**query), expected)
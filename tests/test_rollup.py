@@ -0,0 +1,34 @@
+import io
+import numpy as np
+import pytest
+from benchmarks.synthetic import make_catalog
+from modules.ingestion import CSVIngestor
+from modules.rollup import UNCATEGORIZED, CategoryRollup
+
+@pytest.fixture
+def messy(processor):
+    """A catalog with blank cells, including blank categories"""
+    raw = make_catalog(3000, seed=5, nan_rate=0.03, messy_headers=False)
+    raw.loc[::50, 'category'] = np.nan
+    return CSVIngestor(processor).ingest(io.BytesIO(raw.to_csv(index=False).encode()))
+
+def test_kpis_match_full_frame_aggregates(messy):
+    kpis = CategoryRollup(messy, top_n=5).kpis()
+
+    assert kpis['revenue'] == pytest.approx(messy['revenue'].sum())
+    assert kpis['profit'] == pytest.approx(messy['profit'].sum())
+    assert kpis['skus'] == len(messy)
+    assert kpis['avg_cash_cycle_days'] == pytest.approx(messy['cash_cycle_days'].mean())
+    assert kpis['avg_loops_per_year'] == pytest.approx(messy['loops_per_year'].mean())
+
+def test_tree_children_add_up_to_their_category(messy):
+    rollup = CategoryRollup(messy, top_n=5)
+    nodes = rollup.nodes
+    children = nodes[nodes['parent'] != '']
+
+    assert children.groupby('parent')['skus'].size().max() <= 5 + 1 #top SKUs plus one "Other"
+    sums = children.groupby('parent')[['revenue', 'skus']].sum()
+    expected = messy.assign(category=messy['category'].astype(object).fillna(UNCATEGORIZED)) \
+        .groupby('category').agg(revenue=('revenue', 'sum'), skus=('revenue', 'size'))
+    np.testing.assert_allclose(sums.loc[expected.index, 'revenue'], expected['revenue'])
+    np.testing.assert_array_equal(sums.loc[expected.index, 'skus'], expected['skus'])
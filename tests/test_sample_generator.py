@@ -0,0 +1,36 @@
+import pytest
+from modules.sample_generator import GenerationError, SampleDataClient
+
+VALID = "sku,category,units_sold\nA-1,Coffee,10\n"
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, text):
+        self.text = text
+
+    def json(self):
+        return [{'generated_text': self.text}]
+
+@pytest.fixture
+def client(tmp_path):
+    client = SampleDataClient('key', cache_dir=str(tmp_path))
+    client.answers = []
+    client.session.post = lambda *args, **kwargs: FakeResponse(client.answers.pop(0))
+    return client
+
+def test_malformed_answers_are_not_cached(client):
+    client.answers = ['Sure! Here is "your data', VALID]
+    with pytest.raises(GenerationError) as error:
+        client.generate('prompt')
+    assert error.value.text == 'Sure! Here is "your data'
+
+    assert client.generate('prompt') == VALID #asked again, not served from the cache
+    assert client.generate('prompt') == VALID #now cached, no answer left to pop
+
+def test_use_cache_false_asks_again_and_replaces_the_cached_answer(client):
+    fresh = VALID + "B-2,Tea,4\n"
+    client.answers = [VALID, fresh]
+    client.generate('prompt')
+    assert client.generate('prompt', use_cache=False) == fresh
+    assert client.generate('prompt') == fresh
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from modules.scenario_engine import ScenarioEngine
+
+@pytest.fixture
+def engine(catalog):
+    # One SKU with a zero-day cycle and no revenue, which the efficiency guard has to leave out
+    catalog.loc[0, ['units_sold', 'inventory_days', 'customer_payment_days', 'supplier_payment_days']] = [0, 10, 0, 10]
+    catalog.loc[0, ['revenue', 'cash_cycle_days']] = [0, 0]
+    return ScenarioEngine(catalog)
+
+@pytest.mark.parametrize('inv_reduction, payment_improvement', [(0, 0), (5, 3), (30, 30)])
+def test_zero_spread_simulation_matches_summarize(engine, inv_reduction, payment_improvement):
+    summary = engine.summarize(inv_reduction, payment_improvement)
+    result = engine.simulate(draws=4, inventory=('normal', inv_reduction, 0), payment=('normal', payment_improvement, 0))
+
+    # Same totals, only summed in a different order
+    np.testing.assert_allclose(result['draws']['revenue_efficiency'], summary['revenue_efficiency'], rtol=1e-9)
+    np.testing.assert_allclose(result['draws']['loops_per_year'], summary['loops_per_year'], rtol=1e-9)
+    assert (result['excluded_skus'] == summary['excluded_skus']).all()
+
+def test_sweep_matches_summarize(engine):
+    grid = engine.sweep(range(0, 31, 10), range(0, 31, 10))
+    for i, inv_reduction in enumerate(range(0, 31, 10)):
+        for j, payment_improvement in enumerate(range(0, 31, 10)):
+            summary = engine.summarize(inv_reduction, payment_improvement)
+            assert np.isfinite(grid['revenue_efficiency'][i, j])
+            assert grid['revenue_efficiency'][i, j] == pytest.approx(summary['revenue_efficiency'])
+
+def test_simulation_is_seeded_and_bands_are_ordered(catalog):
+    settings = dict(draws=200, inventory=('triangular', 5, 3), payment=('uniform', 5, 3), seed=3)
+    first = ScenarioEngine(catalog).simulate(**settings)
+    second = ScenarioEngine(catalog).simulate(**settings)
+
+    np.testing.assert_array_equal(first['draws']['revenue_efficiency'], second['draws']['revenue_efficiency'])
+    for metric in ['revenue_efficiency', 'loops_per_year']:
+        band = first['bands'][metric]
+        assert band['p10'] <= band['p50'] <= band['p90']
@@ -0,0 +1,24 @@
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from modules.memory import compact_frame
+from modules.snapshots import SnapshotStore
+
+def test_snapshot_round_trip_keeps_values_and_dtypes(catalog, tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    df = compact_frame(catalog)
+    meta = store.save(df, 'Client export.csv', source_fingerprint='ab' * 32)
+
+    loaded, loaded_meta = store.load(meta['snapshot_id'])
+    pd.testing.assert_frame_equal(loaded, df, check_dtype=False)
+    assert isinstance(loaded['category'].dtype, pd.CategoricalDtype)
+    assert loaded_meta['rows'] == len(df) and not loaded_meta['stale']
+    assert [m['snapshot_id'] for m in store.list()] == [meta['snapshot_id']]
+
+def test_concurrent_saves_of_one_snapshot_all_succeed(catalog, tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        metas = list(pool.map(lambda i: store.save(catalog, 'same', source_fingerprint='cd' * 32), range(16)))
+
+    assert {m['snapshot_id'] for m in metas} == {metas[0]['snapshot_id']}
+    assert [p.name for p in tmp_path.iterdir()] == [f"{metas[0]['snapshot_id']}.arrow"] #no temp files left behind
+    pd.testing.assert_frame_equal(store.load(metas[0]['snapshot_id'])[0], catalog, check_dtype=False)
@@ -0,0 +1,31 @@
+import pytest
+from modules.industry_benchmarks import IndustryBenchmarks
+from modules.visuals import Visualizations
+from config import Config
+
+@pytest.fixture
+def benchmark():
+    benchmarks = IndustryBenchmarks(Config.SAMPLE_BENCHMARK_DATA_PATH)
+    return benchmarks.summary('retail', 'mid')
+
+def test_large_catalogs_use_webgl_and_binned_charts(catalog, benchmark):
+    visuals = Visualizations(large_data_threshold=len(catalog) - 1)
+    matrix = visuals.cached_figure('priority_matrix', catalog)
+    comparison = visuals.cached_figure('benchmark_comparison', catalog, benchmark)
+
+    assert {trace.type for trace in matrix.data} == {'scattergl'}
+    assert len(comparison.data) == 3
+    assert all(len(trace.x) == 40 for trace in comparison.data) #bins, not one bar per SKU
+
+def test_small_catalogs_keep_per_sku_charts(catalog, benchmark):
+    catalog = catalog.head(500) #plotly's own 'auto' mode switches to WebGL above 1000 points
+    visuals = Visualizations(large_data_threshold=len(catalog))
+    matrix = visuals.cached_figure('priority_matrix', catalog)
+    comparison = visuals.cached_figure('benchmark_comparison', catalog, benchmark)
+
+    assert {trace.type for trace in matrix.data} == {'scatter'}
+    assert all(len(trace.x) == len(catalog) for trace in comparison.data)
+
+def test_figures_are_reused_for_the_same_data(catalog):
+    visuals = Visualizations()
+    assert visuals.cached_figure('priority_matrix', catalog) is visuals.cached_figure('priority_matrix', catalog.copy())
@@ -0,0 +1,8 @@
+from modules import warmup
+
+def test_every_warmup_step_succeeds():
+    warmup._run()
+    timings = warmup.timings()
+
+    assert set(timings) == {name for name, _ in warmup.STEPS}
+    assert {name: step['error'] for name, step in timings.items() if not step['ok']} == {}